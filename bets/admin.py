@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Modalidade, Jogo, Palpite, Perfil, Aposta
+from .models import Modalidade, Jogo, Palpite, Perfil, Aposta, ResumoApostas
+from .signals import apurar_jogo
 
 @admin.register(Modalidade)
 class ModalidadeAdmin(admin.ModelAdmin):
@@ -9,6 +10,7 @@ class ModalidadeAdmin(admin.ModelAdmin):
 class JogoAdmin(admin.ModelAdmin):
     list_display = ('time1','time2','modalidade','data','odd_time1','odd_empate','odd_time2','finalizado')
     list_filter = ('modalidade','finalizado')
+    actions = ('reapurar',)
     fieldsets = (
         ('Informações do Jogo', {
             'fields': ('modalidade', 'time1', 'time2', 'data', 'finalizado')
@@ -21,6 +23,13 @@ class JogoAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Reapurar palpites e apostas (placar corrigido)')
+    def reapurar(self, request, queryset):
+        jogos = queryset.filter(placar_time1__isnull=False, placar_time2__isnull=False)
+        for jogo in jogos:
+            apurar_jogo(jogo, reapurar=True)
+        self.message_user(request, f'{len(jogos)} jogo(s) reapurado(s).')
+
 @admin.register(Aposta)
 class ApostaAdmin(admin.ModelAdmin):
     list_display = ('usuario','jogo','tipo','valor_apostado','odd_aposta','status','ganho_realizado','criado_em')
@@ -35,4 +44,9 @@ class PalpiteAdmin(admin.ModelAdmin):
 @admin.register(Perfil)
 class PerfilAdmin(admin.ModelAdmin):
     list_display = ('user','xp','nivel')
-    readonly_fields = ('xp','nivel')
\ No newline at end of file
+    readonly_fields = ('xp','nivel')
+
+@admin.register(ResumoApostas)
+class ResumoApostasAdmin(admin.ModelAdmin):
+    list_display = ('escopo','chave','tipo','faixa_odd','apostas','ganhas','perdidas','total_apostado','total_pago')
+    list_filter = ('escopo','tipo','faixa_odd')
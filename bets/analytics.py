@@ -0,0 +1,123 @@
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import Aposta, ResumoApostas, TipoAposta
+
+# Limites das faixas de odd usadas nos resumos
+FAIXAS_ODD = (Decimal('1.50'), Decimal('2.00'), Decimal('3.00'), Decimal('5.00'), Decimal('10.00'))
+NOMES_FAIXAS = ('<1.50', '1.50-2', '2-3', '3-5', '5-10', '>=10')
+
+ROTULOS_TIPO = dict(TipoAposta.choices)
+
+CENTAVOS = Decimal('0.01')
+
+
+def faixa_odd(odd):
+    """Retorna o nome da faixa de uma odd"""
+    return NOMES_FAIXAS[bisect_right(FAIXAS_ODD, odd)]
+
+
+def _recortes(jogo):
+    """Recortes (escopo, chave, referências) em que as apostas de um jogo entram"""
+    dia = timezone.localdate(jogo.data)
+    return [
+        ('DIA', dia.isoformat(), {'data': dia}),
+        ('JOGO', str(jogo.pk), {'jogo_id': jogo.pk, 'modalidade_id': jogo.modalidade_id}),
+        ('MODALIDADE', str(jogo.modalidade_id), {'modalidade_id': jogo.modalidade_id}),
+    ]
+
+
+def registrar_liquidacao(jogo, apostas, sinal=1):
+    """Soma nos resumos as apostas que acabaram de ser liquidadas.
+
+    Recebe as apostas já em memória (status GANHOU/PERDEU), então não faz
+    nenhuma leitura em Aposta; grava um UPDATE incremental por recorte.
+    Com sinal=-1 desconta as apostas (usado na reapuração).
+    """
+    deltas = defaultdict(lambda: {'apostas': 0, 'ganhas': 0, 'perdidas': 0,
+                                  'total_apostado': Decimal('0'), 'total_pago': Decimal('0')})
+    for aposta in apostas:
+        if aposta.status not in ('GANHOU', 'PERDEU'):
+            continue
+        delta = deltas[(aposta.tipo, faixa_odd(aposta.odd_aposta))]
+        delta['apostas'] += 1
+        delta['ganhas' if aposta.status == 'GANHOU' else 'perdidas'] += 1
+        delta['total_apostado'] += aposta.valor_apostado
+        delta['total_pago'] += aposta.ganho_realizado
+
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        for escopo, chave, referencias in _recortes(jogo):
+            for (tipo, faixa), delta in deltas.items():
+                resumo, created = ResumoApostas.objects.get_or_create(
+                    escopo=escopo, chave=chave, tipo=tipo, faixa_odd=faixa,
+                    defaults=referencias,
+                )
+                ResumoApostas.objects.filter(pk=resumo.pk).update(
+                    **{campo: F(campo) + valor * sinal for campo, valor in delta.items()}
+                )
+
+
+def reconstruir_resumos():
+    """Refaz todos os resumos a partir das apostas liquidadas (carga inicial)"""
+    with transaction.atomic():
+        ResumoApostas.objects.all().delete()
+        apostas = Aposta.objects.filter(
+            status__in=['GANHOU', 'PERDEU']
+        ).select_related('jogo').order_by('jogo_id')
+        jogo, lote = None, []
+        for aposta in apostas.iterator(chunk_size=2000):
+            if jogo is not None and aposta.jogo_id != jogo.pk:
+                registrar_liquidacao(jogo, lote)
+                lote = []
+            jogo = aposta.jogo
+            lote.append(aposta)
+        if lote:
+            registrar_liquidacao(jogo, lote)
+
+
+def resumo_por(campo, escopo='MODALIDADE', ordem=None, limite=None, rotulo=None):
+    """Agrupa os resumos de um escopo por `campo` (ex.: 'tipo', 'faixa_odd').
+
+    O escopo MODALIDADE contém cada aposta liquidada uma única vez, por isso
+    é a base padrão para os totais por tipo e por faixa de odd. `rotulo` é um
+    campo só de exibição (ex.: o nome quando se agrupa pelo id).
+    """
+    campos = [campo, rotulo] if rotulo else [campo]
+    linhas = ResumoApostas.objects.filter(escopo=escopo).values(*campos).annotate(
+        apostas=Sum('apostas'),
+        ganhas=Sum('ganhas'),
+        perdidas=Sum('perdidas'),
+        total_apostado=Sum('total_apostado'),
+        total_pago=Sum('total_pago'),
+    ).order_by(ordem or campo)
+    if limite:
+        linhas = linhas[:limite]
+
+    resultado = []
+    for linha in linhas:
+        liquidadas = linha['ganhas'] + linha['perdidas']
+        linha['taxa_acerto'] = round(linha['ganhas'] * 100 / liquidadas, 2) if liquidadas else 0
+        # No SQLite a soma de decimais volta com casas de sobra
+        linha['total_apostado'] = linha['total_apostado'].quantize(CENTAVOS)
+        linha['total_pago'] = linha['total_pago'].quantize(CENTAVOS)
+        linha['margem'] = linha['total_apostado'] - linha['total_pago']
+        linha['rotulo'] = linha[rotulo] if rotulo else ROTULOS_TIPO.get(linha[campo], linha[campo])
+        resultado.append(linha)
+    return resultado
+
+
+def painel():
+    """Dados do painel de análise, lidos apenas dos resumos"""
+    return {
+        'por_modalidade': resumo_por('modalidade_id', rotulo='modalidade__nome', ordem='modalidade__nome'),
+        'por_tipo': resumo_por('tipo'),
+        'por_faixa': sorted(resumo_por('faixa_odd'), key=lambda linha: NOMES_FAIXAS.index(linha['faixa_odd'])),
+        'por_dia': resumo_por('data', escopo='DIA', ordem='-data', limite=30),
+    }
@@ -0,0 +1,65 @@
+"""Motor único de apuração de palpites e apostas.
+
+Recebe o placar final de um jogo e as previsões em colunas (listas
+paralelas, uma posição por palpite/aposta) e devolve as colunas de
+resultado. Não acessa o banco: quem chama busca as colunas, aplica o
+resultado e grava em lote. Usado pelos modelos, pela liquidação em
+signals.py e pela reapuração de jogos com placar corrigido.
+"""
+from decimal import Decimal
+
+from .models import TipoAposta
+
+PONTOS_PLACAR_EXATO = 50
+PONTOS_RESULTADO = 10
+
+_TIPO_1X2 = TipoAposta.RESULTADO_1X2.value
+_TIPO_PLACAR = TipoAposta.PLACAR_EXATO.value
+_ZERO = Decimal('0')
+
+
+def resultado_1x2(placar_time1, placar_time2):
+    """Resultado no formato 1X2 ('1', 'X' ou '2')"""
+    if placar_time1 > placar_time2:
+        return '1'
+    if placar_time1 < placar_time2:
+        return '2'
+    return 'X'
+
+
+def pontuar_palpites(placar_time1, placar_time2, palpites_time1, palpites_time2):
+    """Pontos de cada palpite: 50 pelo placar exato, 10 pelo vencedor/empate, 0 caso contrário"""
+    resultado = (placar_time1 > placar_time2) - (placar_time1 < placar_time2)
+    return [
+        PONTOS_PLACAR_EXATO if p1 == placar_time1 and p2 == placar_time2
+        else PONTOS_RESULTADO if (p1 > p2) - (p1 < p2) == resultado
+        else 0
+        for p1, p2 in zip(palpites_time1, palpites_time2)
+    ]
+
+
+def apurar_apostas(placar_time1, placar_time2, tipos, apostas_1x2, palpites_time1, palpites_time2, ganhos_potenciais):
+    """Status ('GANHOU'/'PERDEU') e ganho realizado de cada aposta.
+
+    Tipos que ainda não têm regra de apuração (ex.: VENCEDOR) voltam com
+    status e ganho None, e devem ser mantidos como estão.
+    """
+    resultado = resultado_1x2(placar_time1, placar_time2)
+    status = []
+    ganhos = []
+    for tipo, aposta_1x2, p1, p2, potencial in zip(tipos, apostas_1x2, palpites_time1, palpites_time2, ganhos_potenciais):
+        if tipo == _TIPO_1X2:
+            acertou = aposta_1x2 == resultado
+        elif tipo == _TIPO_PLACAR:
+            acertou = p1 == placar_time1 and p2 == placar_time2
+        else:
+            status.append(None)
+            ganhos.append(None)
+            continue
+        if acertou:
+            status.append('GANHOU')
+            ganhos.append(potencial)
+        else:
+            status.append('PERDEU')
+            ganhos.append(_ZERO)
+    return status, ganhos
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from .cache import PERFIL_CACHE_TTL, chave_usuario
+
+User = get_user_model()
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend que guarda no cache o usuário já com o perfil (select_related).
+
+    Assim uma página autenticada não precisa de nenhuma consulta ao banco para
+    identificar o usuário enquanto o cache estiver válido. O cache é invalidado
+    pelos sinais de User e Perfil (veja signals.py).
+    """
+
+    def get_user(self, user_id):
+        chave = chave_usuario(user_id)
+        user = cache.get(chave)
+        if user is None:
+            try:
+                user = User._default_manager.select_related('perfil').get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(chave, user, PERFIL_CACHE_TTL)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from .models import Perfil
+
+# Tempo (em segundos) que o pacote usuário + perfil fica no cache
+PERFIL_CACHE_TTL = getattr(settings, 'PERFIL_CACHE_TTL', 60)
+
+
+def chave_usuario(user_id):
+    """Chave de cache do pacote usuário + perfil.
+
+    Inclui a versão 'usuarios', para que atualizações na tabela inteira
+    descartem todos os pacotes de uma vez (veja invalidar_todos_usuarios).
+    """
+    return f'bets:usuario:{versao("usuarios")}:{user_id}'
+
+
+def invalidar_usuario(user_id):
+    """Remove do cache o pacote usuário + perfil (ex.: quando o XP muda)"""
+    cache.delete(chave_usuario(user_id))
+
+
+def invalidar_usuarios(user_ids):
+    """Versão em lote de invalidar_usuario (chame com lotes de tamanho limitado)"""
+    cache.delete_many([chave_usuario(user_id) for user_id in user_ids])
+
+
+def invalidar_todos_usuarios():
+    """Descarta todos os pacotes usuário + perfil, para atualizações na tabela inteira"""
+    nova_versao('usuarios')
+
+
+def obter_perfil(user):
+    """Retorna o Perfil do usuário sem consultar o banco quando possível.
+
+    O perfil já vem junto com o usuário carregado pelo CachedModelBackend;
+    só cai no get_or_create se o perfil ainda não existir.
+    """
+    try:
+        return user.perfil
+    except Perfil.DoesNotExist:
+        perfil, created = Perfil.objects.get_or_create(user=user)
+        invalidar_usuario(user.pk)
+        return perfil
+
+
+def chave_versao(nome):
+    return f'bets:versao:{nome}'
+
+
+def versao(nome):
+    """Versão atual de um conjunto de dados ('jogos', 'perfis'), usada nas chaves
+    do cache de fragmentos dos templates. Se a chave sumir do cache, recomeça a
+    partir do relógio, para nunca reaproveitar fragmentos antigos."""
+    chave = chave_versao(nome)
+    valor = cache.get(chave)
+    if valor is None:
+        cache.add(chave, time.time_ns(), None)
+        valor = cache.get(chave)
+    return valor
+
+
+async def aversao(nome):
+    """Versão assíncrona de versao()"""
+    chave = chave_versao(nome)
+    valor = await cache.aget(chave)
+    if valor is None:
+        await cache.aadd(chave, time.time_ns(), None)
+        valor = await cache.aget(chave)
+    return valor
+
+
+def nova_versao(nome):
+    """Invalida os fragmentos que dependem do conjunto de dados"""
+    try:
+        cache.incr(chave_versao(nome))
+    except ValueError:
+        versao(nome)
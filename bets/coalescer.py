@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from .mercado import MercadoFechado, travar_jogos_abertos
+from .models import Aposta
+
+
+class ApostaNaoGravada(Exception):
+    """A fila não conseguiu gravar a aposta a tempo; ela não foi registrada"""
+
+
+class FilaApostas:
+    """Agrupa inserções de apostas concorrentes num único bulk_create.
+
+    Cada requisição enfileira sua aposta e espera o resultado; uma thread
+    de fundo junta o que chegar dentro de `janela` segundos (até `lote`
+    apostas) e grava tudo de uma vez. A resposta só sai depois da gravação,
+    então o usuário continua vendo a aposta logo após o redirect.
+    """
+
+    def __init__(self, janela=0.005, lote=500):
+        self.janela = janela
+        self.lote = lote
+        self._fila = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def salvar(self, aposta, timeout=5):
+        """Enfileira a aposta e bloqueia até ela ser gravada (ou falhar).
+
+        Se o lote não começar a ser gravado dentro do timeout, a aposta é
+        retirada da fila e levanta ApostaNaoGravada: ela com certeza não foi
+        gravada, então o usuário pode tentar de novo sem duplicar.
+        """
+        self._iniciar()
+        futuro = Future()
+        self._fila.put((aposta, futuro))
+        try:
+            return futuro.result(timeout=timeout)
+        except FuturesTimeoutError:
+            if futuro.cancel():
+                raise ApostaNaoGravada()
+            # O lote já está sendo gravado: espera o resultado dele
+            return futuro.result()
+
+    def _iniciar(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name='fila-apostas', daemon=True)
+                    self._thread.start()
+
+    def _loop(self):
+        while True:
+            pendentes = [self._fila.get()]
+            limite = time.monotonic() + self.janela
+            while len(pendentes) < self.lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    pendentes.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._gravar(pendentes)
+
+    def _gravar(self, pendentes):
+        # Descarta as apostas cujo salvar() desistiu por timeout; as demais
+        # passam a "em execução" e não podem mais ser canceladas
+        pendentes = [(aposta, futuro) for aposta, futuro in pendentes if futuro.set_running_or_notify_cancel()]
+        if not pendentes:
+            return
+        close_old_connections()
+        try:
+            with transaction.atomic():
+                abertos = travar_jogos_abertos({aposta.jogo_id for aposta, futuro in pendentes})
+                aceitas = []
+                for aposta, futuro in pendentes:
+                    if aposta.jogo_id in abertos:
+                        aceitas.append((aposta, futuro))
+                    else:
+                        futuro.set_exception(MercadoFechado())
+                Aposta.objects.bulk_create([aposta for aposta, futuro in aceitas])
+        except Exception:
+            # Um registro ruim não pode derrubar o lote inteiro: grava um a um
+            for aposta, futuro in pendentes:
+                if futuro.done():
+                    continue
+                try:
+                    _inserir(aposta)
+                except Exception as erro:
+                    futuro.set_exception(erro)
+                else:
+                    futuro.set_result(aposta)
+        else:
+            for aposta, futuro in aceitas:
+                futuro.set_result(aposta)
+
+
+def _inserir(aposta):
+    """Insere a aposta só se o jogo ainda estiver aberto (ver travar_jogos_abertos)"""
+    with transaction.atomic():
+        if aposta.jogo_id not in travar_jogos_abertos([aposta.jogo_id]):
+            raise MercadoFechado()
+        aposta.save(force_insert=True)
+    return aposta
+
+
+fila_apostas = FilaApostas(
+    janela=getattr(settings, 'APOSTAS_COALESCER_JANELA_MS', 5) / 1000,
+    lote=getattr(settings, 'APOSTAS_COALESCER_LOTE', 500),
+)
+
+
+def salvar_aposta(aposta):
+    """Grava a aposta, pela fila de coalescência se APOSTAS_COALESCER estiver ligado.
+
+    Levanta MercadoFechado se o jogo fechou entre a abertura da página e a gravação.
+    """
+    if getattr(settings, 'APOSTAS_COALESCER', False):
+        return fila_apostas.salvar(aposta)
+    return _inserir(aposta)
@@ -0,0 +1,35 @@
+"""Consultas das páginas de leitura, compartilhadas entre views.py e views_async.py.
+
+Montar os querysets num só lugar evita que as duas versões das views
+divirjam (por exemplo, uma esquecer o select_related da outra). Todas
+retornam querysets preguiçosos; quem chama decide se avalia de forma
+síncrona ou assíncrona.
+"""
+from django.db.models import Q
+from django.utils import timezone
+from .models import Perfil, Jogo
+
+
+def proximos_jogos(limite=5):
+    """Próximos jogos em aberto, com a modalidade já carregada"""
+    return Jogo.objects.select_related('modalidade').filter(
+        data__gte=timezone.now(),
+        finalizado=False
+    ).order_by('data')[:limite]
+
+
+def ranking(limite=50):
+    """Perfis com mais XP, com o usuário já carregado"""
+    return Perfil.objects.select_related('user').order_by('-xp')[:limite]
+
+
+def jogos_por_status(modalidade=None):
+    """Retorna (jogos_futuros, jogos_passados), opcionalmente de uma modalidade"""
+    jogos = Jogo.objects.select_related('modalidade').all()
+    if modalidade is not None:
+        jogos = jogos.filter(modalidade=modalidade)
+
+    agora = timezone.now()
+    jogos_futuros = jogos.filter(data__gte=agora, finalizado=False).order_by('data')
+    jogos_passados = jogos.filter(Q(data__lt=agora) | Q(finalizado=True)).order_by('-data')
+    return jogos_futuros, jogos_passados
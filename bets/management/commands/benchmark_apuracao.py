@@ -0,0 +1,49 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from bets.apuracao import apurar_apostas, pontuar_palpites
+from bets.models import TipoAposta
+
+
+class Command(BaseCommand):
+    help = 'Microbenchmark do motor de apuração: lote em colunas x uma previsão por chamada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, default=1000000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        n = options['quantidade']
+        rng = random.Random(options['seed'])
+        placar = (2, 1)
+
+        palpites_time1 = [rng.randint(0, 4) for _ in range(n)]
+        palpites_time2 = [rng.randint(0, 4) for _ in range(n)]
+        tipos = [rng.choice([TipoAposta.RESULTADO_1X2.value, TipoAposta.PLACAR_EXATO.value]) for _ in range(n)]
+        apostas_1x2 = [rng.choice('1X2') for _ in range(n)]
+        ganhos_potenciais = [Decimal(rng.randint(200, 5000)) / 100 for _ in range(n)]
+        self.stdout.write(f'{n} previsões')
+
+        inicio = time.perf_counter()
+        pontuar_palpites(*placar, palpites_time1, palpites_time2)
+        self._linha('Palpites em lote', n, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for p1, p2 in zip(palpites_time1, palpites_time2):
+            pontuar_palpites(*placar, [p1], [p2])
+        self._linha('Palpites um a um', n, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        apurar_apostas(*placar, tipos, apostas_1x2, palpites_time1, palpites_time2, ganhos_potenciais)
+        self._linha('Apostas em lote', n, time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        for coluna in zip(tipos, apostas_1x2, palpites_time1, palpites_time2, ganhos_potenciais):
+            apurar_apostas(*placar, *([valor] for valor in coluna))
+        self._linha('Apostas uma a uma', n, time.perf_counter() - inicio)
+
+    def _linha(self, rotulo, n, segundos):
+        self.stdout.write(f'{rotulo:<20} {segundos:7.3f} s ({n / segundos / 1e6:5.2f} M/s)')
@@ -0,0 +1,55 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from bets.models import Perfil
+from bets.signals import criar_perfil_usuario
+
+
+class Command(BaseCommand):
+    help = 'Compara o recálculo de nível perfil a perfil com o UPDATE ... CASE em lote (dados descartados ao final)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfis', type=int, default=100000, help='Quantidade de perfis gerados')
+
+    def handle(self, *args, **options):
+        total = options['perfis']
+        with transaction.atomic():
+            post_save.disconnect(criar_perfil_usuario, sender=User)
+            try:
+                self._gerar(total)
+            finally:
+                post_save.connect(criar_perfil_usuario, sender=User)
+            perfis = Perfil.objects.filter(user__username__startswith='bench_nivel_')
+
+            # Caminho antigo: um objeto por vez, com um save por perfil alterado
+            perfis.update(nivel=1)
+            inicio = time.perf_counter()
+            for perfil in perfis.iterator(chunk_size=2000):
+                perfil.atualizar_nivel()
+            individual = time.perf_counter() - inicio
+
+            # Caminho em lote: um único UPDATE ... CASE
+            perfis.update(nivel=1)
+            inicio = time.perf_counter()
+            perfis.recalcular_niveis()
+            lote = time.perf_counter() - inicio
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'{total} perfis')
+        self.stdout.write(f'Perfil a perfil: {individual:.2f} s')
+        self.stdout.write(f'UPDATE ... CASE: {lote:.2f} s ({individual / lote:.0f}x mais rápido)')
+
+    def _gerar(self, total):
+        usuarios = User.objects.bulk_create(
+            [User(username=f'bench_nivel_{i}') for i in range(total)],
+            batch_size=2000,
+        )
+        Perfil.objects.bulk_create(
+            [Perfil(user=u, xp=(i * 37) % 4000) for i, u in enumerate(usuarios)],
+            batch_size=2000,
+        )
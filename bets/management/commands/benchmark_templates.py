@@ -0,0 +1,49 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+PAGINAS = ['listar_jogos', 'ranking']
+
+
+class Command(BaseCommand):
+    help = 'Mede o tempo de resposta das páginas de jogos e ranking sem e com cache de fragmentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=200)
+
+    def handle(self, *args, **options):
+        anonimo = Client()
+        logado = Client()
+        usuario = User.objects.order_by('pk').first()
+        if usuario:
+            logado.force_login(usuario)
+
+        sem_cache = dict(settings.CACHES, fragmentos={'BACKEND': 'django.core.cache.backends.dummy.DummyCache'})
+        hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        try:
+            for rotulo, caches in (('sem cache de fragmentos', sem_cache), ('com cache de fragmentos', settings.CACHES)):
+                self.stdout.write(f'\n{rotulo}:')
+                with override_settings(CACHES=caches, ALLOWED_HOSTS=hosts):
+                    for nome in PAGINAS:
+                        for variante, client in (('anônimo', anonimo), ('logado', logado)):
+                            tempos = self._medir(client, reverse(nome), options['repeticoes'])
+                            self.stdout.write(
+                                f'  {nome:<14}{variante:<9} média {statistics.mean(tempos):6.2f} ms | '
+                                f'p50 {statistics.median(tempos):6.2f} ms'
+                            )
+        finally:
+            logado.logout()
+
+    def _medir(self, client, url, repeticoes):
+        client.get(url)  # aquece templates e cache
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            client.get(url)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        return tempos
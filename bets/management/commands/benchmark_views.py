@@ -0,0 +1,95 @@
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+PAGINAS = ['home', 'ranking', 'listar_jogos']
+
+
+class Command(BaseCommand):
+    help = 'Compara requisições/s das páginas de leitura: WSGI com views síncronas x ASGI com views assíncronas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modo', choices=['wsgi', 'asgi', 'ambos'], default='ambos')
+        parser.add_argument('--concorrencia', type=int, default=16, help='Requisições simultâneas')
+        parser.add_argument('--requisicoes', type=int, default=1000, help='Total de requisições por modo')
+
+    def handle(self, *args, **options):
+        if options['modo'] == 'ambos':
+            # As views são escolhidas no carregamento das URLs, então cada
+            # modo roda num processo próprio com BETS_VIEWS_ASYNC ajustado
+            for modo in ('wsgi', 'asgi'):
+                env = dict(os.environ, BETS_VIEWS_ASYNC='1' if modo == 'asgi' else '0')
+                subprocess.run([
+                    sys.executable, sys.argv[0], 'benchmark_views', '--modo', modo,
+                    '--concorrencia', str(options['concorrencia']),
+                    '--requisicoes', str(options['requisicoes']),
+                ], env=env, check=True)
+            return
+
+        modo = options['modo']
+        if settings.BETS_VIEWS_ASYNC != (modo == 'asgi'):
+            raise CommandError(f'Para o modo {modo} rode com BETS_VIEWS_ASYNC={"1" if modo == "asgi" else "0"}')
+
+        urls = [reverse(nome) for nome in PAGINAS]
+        # Os clientes de teste do Django usam o host 'testserver'
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if modo == 'wsgi':
+                duracao, latencias = self._wsgi(urls, options['concorrencia'], options['requisicoes'])
+            else:
+                duracao, latencias = asyncio.run(self._asgi(urls, options['concorrencia'], options['requisicoes']))
+
+        percentis = statistics.quantiles(latencias, n=100)
+        self.stdout.write(
+            f'{modo.upper()}: {len(latencias) / duracao:.1f} req/s | '
+            f'p50: {percentis[49] * 1000:.1f} ms | p95: {percentis[94] * 1000:.1f} ms '
+            f'({len(latencias)} requisições, concorrência {options["concorrencia"]})'
+        )
+
+    def _wsgi(self, urls, concorrencia, total):
+        latencias = []
+        contador = iter(range(total))
+        lock = threading.Lock()
+
+        def trabalhador():
+            client = Client()
+            while True:
+                with lock:
+                    i = next(contador, None)
+                if i is None:
+                    return
+                inicio = time.perf_counter()
+                client.get(urls[i % len(urls)])
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+
+        workers = [threading.Thread(target=trabalhador) for _ in range(concorrencia)]
+        inicio = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return time.perf_counter() - inicio, latencias
+
+    async def _asgi(self, urls, concorrencia, total):
+        latencias = []
+        semaforo = asyncio.Semaphore(concorrencia)
+        client = AsyncClient()
+
+        async def requisicao(i):
+            async with semaforo:
+                inicio = time.perf_counter()
+                await client.get(urls[i % len(urls)])
+                latencias.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(requisicao(i) for i in range(total)))
+        return time.perf_counter() - inicio, latencias
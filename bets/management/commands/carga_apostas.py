@@ -0,0 +1,99 @@
+import logging
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bets.models import Jogo, Modalidade
+
+
+class Command(BaseCommand):
+    help = 'Teste de carga da view apostar: mede apostas aceitas por segundo sob concorrência'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20, help='Quantidade de usuários simulados')
+        parser.add_argument('--threads', type=int, default=8, help='Requisições simultâneas')
+        parser.add_argument('--duracao', type=float, default=10, help='Duração do teste em segundos')
+        parser.add_argument('--coalescer', action='store_true', help='Liga a fila de coalescência (bulk_create)')
+        parser.add_argument('--com-limite', action='store_true', help='Mantém o rate limiting ligado')
+        parser.add_argument('--manter', action='store_true', help='Não apaga os dados criados pelo teste')
+
+    def handle(self, *args, **options):
+        modalidade = Modalidade.objects.create(nome='Carga (teste)')
+        jogo = Jogo.objects.create(
+            modalidade=modalidade, time1='Carga A', time2='Carga B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        usuarios = []
+        criados = []
+        for i in range(options['usuarios']):
+            usuario, created = User.objects.get_or_create(username=f'carga_{i}')
+            usuarios.append(usuario)
+            if created:
+                criados.append(usuario.pk)
+
+        # As respostas 429 gerariam um aviso de log por requisição
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            with override_settings(
+                APOSTAS_COALESCER=options['coalescer'],
+                RATELIMIT_ENABLED=options['com_limite'],
+            ):
+                resultados = self._executar(jogo, usuarios, options['threads'], options['duracao'])
+        finally:
+            if not options['manter']:
+                jogo.delete()
+                modalidade.delete()
+                # Só apaga os usuários criados por este teste
+                User.objects.filter(pk__in=criados).delete()
+
+        self._relatorio(resultados, options['duracao'])
+
+    def _executar(self, jogo, usuarios, threads, duracao):
+        url = reverse('apostar', args=[jogo.id])
+        dados = {'tipo_aposta': '1X2', 'aposta_1x2': '1', 'valor_apostado': '10.00'}
+        resultados = {'aceitas': [], 'limitadas': 0, 'erros': 0}
+        lock = threading.Lock()
+        fim = time.monotonic() + duracao
+
+        def trabalhador(indice):
+            client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            client.force_login(usuarios[indice % len(usuarios)])
+            while time.monotonic() < fim:
+                inicio = time.perf_counter()
+                resposta = client.post(url, dados)
+                latencia = time.perf_counter() - inicio
+                with lock:
+                    if resposta.status_code == 302:
+                        resultados['aceitas'].append(latencia)
+                    elif resposta.status_code == 429:
+                        resultados['limitadas'] += 1
+                    else:
+                        resultados['erros'] += 1
+            client.logout()
+
+        workers = [threading.Thread(target=trabalhador, args=(i,)) for i in range(threads)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        return resultados
+
+    def _relatorio(self, resultados, duracao):
+        aceitas = resultados['aceitas']
+        self.stdout.write(f"Apostas aceitas: {len(aceitas)} ({len(aceitas) / duracao:.1f}/s)")
+        self.stdout.write(f"Limitadas (429): {resultados['limitadas']}")
+        self.stdout.write(f"Erros: {resultados['erros']}")
+        if len(aceitas) >= 2:
+            percentis = statistics.quantiles(aceitas, n=100)
+            self.stdout.write(
+                f"Latência p50: {percentis[49] * 1000:.1f} ms | "
+                f"p95: {percentis[94] * 1000:.1f} ms | "
+                f"p99: {percentis[98] * 1000:.1f} ms"
+            )
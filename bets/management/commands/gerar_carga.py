@@ -0,0 +1,153 @@
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from bets.models import Jogo, Modalidade
+
+# Mistura de tráfego (rota, peso, precisa de login); pesos aproximam um dia de jogos
+MISTURA = [
+    ('listar_jogos', 30, False),
+    ('home', 20, False),
+    ('ranking', 15, False),
+    ('jogos_por_modalidade', 10, False),
+    ('minhas_apostas', 10, True),
+    ('meus_palpites', 5, True),
+    ('apostar', 5, True),
+    ('apostar_post', 5, True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Gera tráfego HTTP realista contra um servidor em execução e reporta percentis de latência por rota'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Endereço do servidor (runserver, gunicorn, daphne...)')
+        parser.add_argument('--concorrencia', type=int, default=16, help='Clientes simultâneos')
+        parser.add_argument('--duracao', type=float, default=30, help='Duração em segundos')
+        parser.add_argument('--usuarios', type=int, default=50, help='Usuários logados simulados (prefixo seed_)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        usuarios = list(User.objects.filter(username__startswith='seed_').order_by('pk')[:options['usuarios']])
+        jogos_abertos = list(Jogo.objects.filter(finalizado=False, data__gte=timezone.now()).values_list('pk', flat=True)[:500])
+        modalidades = list(Modalidade.objects.values_list('pk', flat=True))
+        if not usuarios or not jogos_abertos or not modalidades:
+            raise CommandError('Sem dados suficientes; rode antes `python manage.py seed_bets`.')
+
+        self.SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+        sessoes = [self._criar_sessao(u) for u in usuarios]
+        try:
+            resultados, duracao = self._executar(options, sessoes, jogos_abertos, modalidades)
+        finally:
+            for chave, csrf in sessoes:
+                self.SessionStore(session_key=chave).delete()
+
+        self._relatorio(resultados, duracao)
+
+    def _criar_sessao(self, usuario):
+        """Cria uma sessão autenticada direto no banco (sem passar pelo login)"""
+        sessao = self.SessionStore()
+        sessao[SESSION_KEY] = str(usuario.pk)
+        sessao[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        sessao[HASH_SESSION_KEY] = usuario.get_session_auth_hash()
+        sessao.create()
+        return sessao.session_key, get_random_string(32)
+
+    def _executar(self, options, sessoes, jogos_abertos, modalidades):
+        base = options['url'].rstrip('/')
+        rotas, pesos, _ = zip(*MISTURA)
+        requer_login = {rota: logado for rota, _, logado in MISTURA}
+        resultados = defaultdict(lambda: {'latencias': [], 'status': defaultdict(int)})
+        lock = threading.Lock()
+        fim = time.monotonic() + options['duracao']
+
+        def cliente(indice):
+            rng = random.Random(options['seed'] + indice)
+            sessao, csrf = sessoes[indice % len(sessoes)]
+            cookies = f'{settings.SESSION_COOKIE_NAME}={sessao}; {settings.CSRF_COOKIE_NAME}={csrf}'
+            anonimo_cookies = f'{settings.CSRF_COOKIE_NAME}={csrf}'
+            while time.monotonic() < fim:
+                rota = rng.choices(rotas, weights=pesos)[0]
+                dados = None
+                if rota == 'jogos_por_modalidade':
+                    caminho = reverse(rota, args=[rng.choice(modalidades)])
+                elif rota in ('apostar', 'apostar_post'):
+                    caminho = reverse('apostar', args=[rng.choice(jogos_abertos)])
+                    if rota == 'apostar_post':
+                        dados = urllib.parse.urlencode({
+                            'tipo_aposta': '1X2',
+                            'aposta_1x2': rng.choice('1X2'),
+                            'valor_apostado': str(rng.choice([2, 5, 10, 20])),
+                        }).encode()
+                else:
+                    caminho = reverse(rota)
+
+                requisicao = urllib.request.Request(base + caminho, data=dados)
+                requisicao.add_header('Cookie', cookies if requer_login[rota] else anonimo_cookies)
+                if dados:
+                    requisicao.add_header('X-CSRFToken', csrf)
+                inicio = time.perf_counter()
+                try:
+                    with _sem_redirect.open(requisicao, timeout=30) as resposta:
+                        resposta.read()
+                        status = resposta.status
+                except urllib.error.HTTPError as erro:
+                    status = erro.code
+                except OSError:
+                    status = 'falha'
+                latencia = time.perf_counter() - inicio
+                with lock:
+                    resultados[rota]['latencias'].append(latencia)
+                    resultados[rota]['status'][status] += 1
+
+        threads = [threading.Thread(target=cliente, args=(i,)) for i in range(options['concorrencia'])]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return resultados, time.perf_counter() - inicio
+
+    def _relatorio(self, resultados, duracao):
+        total = sum(len(r['latencias']) for r in resultados.values())
+        self.stdout.write(f'{total} requisições em {duracao:.1f} s ({total / duracao:.1f} req/s)\n')
+        self.stdout.write(f'{"rota":<22}{"n":>7}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}  status')
+        todas = []
+        for rota, _, _ in MISTURA:
+            if rota not in resultados:
+                continue
+            latencias = resultados[rota]['latencias']
+            todas.extend(latencias)
+            self.stdout.write(f'{rota:<22}{len(latencias):>7}{_percentis(latencias)}  {dict(resultados[rota]["status"])}')
+        self.stdout.write(f'{"TOTAL":<22}{len(todas):>7}{_percentis(todas)}')
+
+
+def _percentis(latencias):
+    if len(latencias) < 2:
+        return f'{"-":>9}{"-":>9}{"-":>9}'
+    p = statistics.quantiles(latencias, n=100)
+    return f'{p[49] * 1000:>9.1f}{p[94] * 1000:>9.1f}{p[98] * 1000:>9.1f}'
+
+
+class _SemRedirect(urllib.request.HTTPRedirectHandler):
+    """Mede só a requisição em si: o redirect pós-aposta não é seguido"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+_sem_redirect = urllib.request.build_opener(_SemRedirect)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from bets.models import Perfil
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o nível de todos os perfis (use após alterar NIVEL_THRESHOLDS)'
+
+    def handle(self, *args, **options):
+        total = Perfil.objects.all().recalcular_niveis()
+        self.stdout.write(self.style.SUCCESS(f'{total} perfil(is) com nível atualizado.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from bets.analytics import reconstruir_resumos
+from bets.models import ResumoApostas
+
+
+class Command(BaseCommand):
+    help = 'Refaz os resumos de análise a partir das apostas já liquidadas (carga inicial)'
+
+    def handle(self, *args, **options):
+        reconstruir_resumos()
+        total = ResumoApostas.objects.count()
+        self.stdout.write(self.style.SUCCESS(f'{total} linha(s) de resumo geradas.'))
@@ -0,0 +1,216 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from bets.analytics import reconstruir_resumos
+from bets.apuracao import apurar_apostas
+from bets.cache import invalidar_todos_usuarios, nova_versao
+from bets.models import Aposta, Jogo, Modalidade, Palpite, Perfil, ResumoApostas, TipoAposta, calcular_nivel
+from bets.signals import calcular_pontos
+
+PREFIXO_USUARIO = 'seed_'
+PREFIXO_MODALIDADE = 'Seed '
+NOMES_MODALIDADES = ['Futsal', 'Vôlei', 'Basquete', 'Handebol', 'Futebol', 'Tênis de Mesa', 'Xadrez', 'Queimada']
+SENHA_PADRAO = 'seed1234'
+
+
+class Command(BaseCommand):
+    help = 'Gera dados sintéticos (usuários, perfis, modalidades, jogos, palpites e apostas) em escala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--modalidades', type=int, default=5)
+        parser.add_argument('--jogos', type=int, default=200)
+        parser.add_argument('--palpites-por-usuario', type=int, default=5)
+        parser.add_argument('--apostas-por-usuario', type=int, default=10)
+        parser.add_argument('--finalizados', type=float, default=0.5, help='Fração dos jogos já finalizados')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador (mesma semente, mesmos dados)')
+        parser.add_argument('--lote', type=int, default=5000, help='Tamanho dos lotes do bulk_create')
+        parser.add_argument('--limpar', action='store_true', help='Apaga os dados gerados anteriormente antes de gerar')
+
+    def handle(self, *args, **options):
+        existentes = User.objects.filter(username__startswith=PREFIXO_USUARIO)
+        if existentes.exists():
+            if not options['limpar']:
+                raise CommandError('Já existem dados gerados; use --limpar para recriá-los.')
+            self._etapa('Removendo dados anteriores', self._limpar)
+
+        # bulk_create não dispara post_save, então nenhum sinal (perfil,
+        # liquidação, XP, cache) roda durante a carga: tudo é calculado aqui.
+        self.rng = random.Random(options['seed'])
+        self.lote = options['lote']
+        self.agora = timezone.now()
+
+        usuarios = self._etapa('Usuários', self._usuarios, options['usuarios'])
+        modalidades = self._etapa('Modalidades', self._modalidades, options['modalidades'])
+        jogos = self._etapa('Jogos', self._jogos, modalidades, options['jogos'], options['finalizados'])
+        xp = self._etapa('Palpites', self._palpites, usuarios, jogos, options['palpites_por_usuario'])
+        self._etapa('Perfis', self._perfis, usuarios, xp)
+        self._etapa('Apostas', self._apostas, usuarios, jogos, options['apostas_por_usuario'])
+        self._etapa('Resumos de análise', reconstruir_resumos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Pronto. Senha de todos os usuários {PREFIXO_USUARIO}*: {SENHA_PADRAO}'
+        ))
+
+    def _etapa(self, nome, funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        self.stdout.write(f'{nome}: {time.perf_counter() - inicio:.1f} s')
+        return resultado
+
+    def _limpar(self):
+        # O delete() do ORM carregaria cada linha para o cascade e os sinais;
+        # aqui cada tabela filha é apagada com um DELETE direto, das folhas
+        # para as raízes. Os resumos de análise são refeitos no fim da carga.
+        usuarios = Q(usuario__username__startswith=PREFIXO_USUARIO)
+        jogos = Q(jogo__modalidade__nome__startswith=PREFIXO_MODALIDADE)
+        de_usuarios = Q(user__username__startswith=PREFIXO_USUARIO)
+        with transaction.atomic():
+            for queryset in (
+                ResumoApostas.objects.filter(
+                    Q(jogo__modalidade__nome__startswith=PREFIXO_MODALIDADE)
+                    | Q(modalidade__nome__startswith=PREFIXO_MODALIDADE)
+                ),
+                Aposta.objects.filter(usuarios | jogos),
+                Palpite.objects.filter(usuarios | jogos),
+                Perfil.objects.filter(de_usuarios),
+                LogEntry.objects.filter(de_usuarios),
+                User.groups.through.objects.filter(de_usuarios),
+                User.user_permissions.through.objects.filter(de_usuarios),
+                Jogo.objects.filter(modalidade__nome__startswith=PREFIXO_MODALIDADE),
+                User.objects.filter(username__startswith=PREFIXO_USUARIO),
+                Modalidade.objects.filter(nome__startswith=PREFIXO_MODALIDADE),
+            ):
+                queryset._raw_delete(queryset.db)
+        # Sem sinais, o cache precisa ser invalidado aqui
+        invalidar_todos_usuarios()
+        nova_versao('perfis')
+        nova_versao('jogos')
+
+    def _em_lotes(self, modelo, objetos, retornar=True):
+        """Grava um gerador de objetos em lotes; com retornar=False não guarda nada em memória"""
+        criados = []
+        lote = []
+        with transaction.atomic():
+            for obj in objetos:
+                lote.append(obj)
+                if len(lote) >= self.lote:
+                    modelo.objects.bulk_create(lote)
+                    if retornar:
+                        criados.extend(lote)
+                    lote = []
+            if lote:
+                modelo.objects.bulk_create(lote)
+                if retornar:
+                    criados.extend(lote)
+        return criados
+
+    def _usuarios(self, total):
+        # Hash calculado uma vez só: o PBKDF2 por usuário dominaria o tempo
+        senha = make_password(SENHA_PADRAO)
+        usuarios = self._em_lotes(User, (
+            User(username=f'{PREFIXO_USUARIO}{i}', password=senha, date_joined=self.agora)
+            for i in range(total)
+        ))
+        return [u.pk for u in usuarios]
+
+    def _modalidades(self, total):
+        return self._em_lotes(Modalidade, (
+            Modalidade(nome=f'{PREFIXO_MODALIDADE}{NOMES_MODALIDADES[i % len(NOMES_MODALIDADES)]} {i // len(NOMES_MODALIDADES) + 1}')
+            for i in range(total)
+        ))
+
+    def _jogos(self, modalidades, total, finalizados):
+        rng = self.rng
+
+        def gerar():
+            for i in range(total):
+                finalizado = rng.random() < finalizados
+                if finalizado:
+                    data = self.agora - timedelta(days=rng.randint(1, 365), minutes=rng.randint(0, 1439))
+                else:
+                    data = self.agora + timedelta(days=rng.randint(1, 60), minutes=rng.randint(0, 1439))
+                odd_time1 = Decimal(rng.randint(120, 450)) / 100
+                odd_time2 = Decimal(rng.randint(120, 450)) / 100
+                yield Jogo(
+                    modalidade=rng.choice(modalidades),
+                    time1=f'Time {rng.randint(1, 200)}',
+                    time2=f'Time {rng.randint(1, 200)}',
+                    data=data,
+                    finalizado=finalizado,
+                    placar_time1=rng.randint(0, 5) if finalizado else None,
+                    placar_time2=rng.randint(0, 5) if finalizado else None,
+                    odd_time1=odd_time1,
+                    odd_empate=Decimal(rng.randint(250, 400)) / 100,
+                    odd_time2=odd_time2,
+                    odd_placar_exato=Decimal(rng.randint(600, 2500)) / 100,
+                )
+
+        return self._em_lotes(Jogo, gerar())
+
+    def _palpites(self, usuarios, jogos, por_usuario):
+        rng = self.rng
+        por_usuario = min(por_usuario, len(jogos))
+        xp = dict.fromkeys(usuarios, 0)
+
+        def gerar():
+            for user_id in usuarios:
+                for jogo in rng.sample(jogos, por_usuario):
+                    palpite = Palpite(
+                        usuario_id=user_id, jogo=jogo,
+                        palpite_time1=rng.randint(0, 4), palpite_time2=rng.randint(0, 4),
+                    )
+                    if jogo.finalizado:
+                        palpite.pontos = calcular_pontos(palpite)
+                        palpite.calculado = True
+                        xp[user_id] += palpite.pontos
+                    yield palpite
+
+        self._em_lotes(Palpite, gerar(), retornar=False)
+        return xp
+
+    def _perfis(self, usuarios, xp):
+        self._em_lotes(Perfil, (
+            Perfil(user_id=user_id, xp=xp[user_id], nivel=calcular_nivel(xp[user_id]))
+            for user_id in usuarios
+        ), retornar=False)
+
+    def _apostas(self, usuarios, jogos, por_usuario):
+        rng = self.rng
+
+        def gerar():
+            for user_id in usuarios:
+                for _ in range(por_usuario):
+                    jogo = rng.choice(jogos)
+                    valor = Decimal(rng.choice([2, 5, 10, 20, 50, 100]))
+                    aposta = Aposta(usuario_id=user_id, jogo=jogo, valor_apostado=valor)
+                    if rng.random() < 0.7:
+                        aposta.tipo = TipoAposta.RESULTADO_1X2
+                        aposta.aposta_1x2 = rng.choice('1X2')
+                        aposta.odd_aposta = {'1': jogo.odd_time1, 'X': jogo.odd_empate, '2': jogo.odd_time2}[aposta.aposta_1x2]
+                    else:
+                        aposta.tipo = TipoAposta.PLACAR_EXATO
+                        aposta.palpite_time1 = rng.randint(0, 4)
+                        aposta.palpite_time2 = rng.randint(0, 4)
+                        aposta.odd_aposta = jogo.odd_placar_exato
+                    aposta.calcular_ganho_potencial()
+                    if jogo.finalizado:
+                        status, ganhos = apurar_apostas(
+                            jogo.placar_time1, jogo.placar_time2,
+                            [aposta.tipo], [aposta.aposta_1x2], [aposta.palpite_time1], [aposta.palpite_time2],
+                            [aposta.ganho_potencial],
+                        )
+                        aposta.status, aposta.ganho_realizado = status[0], ganhos[0]
+                    yield aposta
+
+        self._em_lotes(Aposta, gerar(), retornar=False)
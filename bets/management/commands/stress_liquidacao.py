@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from bets.analytics import registrar_liquidacao
+from bets.models import Aposta, Jogo, Modalidade, ResumoApostas
+
+
+class Command(BaseCommand):
+    help = ('Teste de estresse: apostas simultâneas durante a liquidação não podem ficar PENDENTES. '
+            'Grava no banco configurado; a prova automatizada fica em bets/tests.py')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Apostadores simultâneos')
+        parser.add_argument('--rodadas', type=int, default=5, help='Quantidade de jogos liquidados')
+        parser.add_argument('--atraso', type=float, default=0.5, help='Segundos de apostas antes de liquidar')
+        parser.add_argument('--coalescer', action='store_true', help='Liga a fila de coalescência (bulk_create)')
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        modalidade = Modalidade.objects.create(nome='Estresse (teste)')
+        usuarios = []
+        criados = []
+        for i in range(options['threads']):
+            usuario, created = User.objects.get_or_create(username=f'estresse_{i}')
+            usuarios.append(usuario)
+            if created:
+                criados.append(usuario.pk)
+        orfas_total = 0
+        try:
+            with override_settings(APOSTAS_COALESCER=options['coalescer'], RATELIMIT_ENABLED=False):
+                for rodada in range(1, options['rodadas'] + 1):
+                    aceitas, orfas = self._rodada(modalidade, usuarios, options['atraso'])
+                    orfas_total += orfas
+                    self.stdout.write(f'Rodada {rodada}: {aceitas} apostas aceitas, {orfas} PENDENTE(s) após liquidar')
+        finally:
+            self._descontar_resumos(modalidade)
+            modalidade.delete()
+            # Só apaga os usuários criados por este teste
+            User.objects.filter(pk__in=criados).delete()
+
+        if orfas_total:
+            raise CommandError(f'{orfas_total} aposta(s) ficaram PENDENTES após a liquidação')
+        self.stdout.write(self.style.SUCCESS('Nenhuma aposta órfã.'))
+
+    def _rodada(self, modalidade, usuarios, atraso):
+        jogo = Jogo.objects.create(
+            modalidade=modalidade, time1='Estresse A', time2='Estresse B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        url = reverse('apostar', args=[jogo.id])
+        dados = {'tipo_aposta': '1X2', 'aposta_1x2': '1', 'valor_apostado': '10.00'}
+        parar = threading.Event()
+
+        def apostador(usuario):
+            client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            client.force_login(usuario)
+            # Continua apostando um pouco depois da liquidação, para exercitar a corrida
+            while not parar.is_set():
+                client.post(url, dados)
+            client.logout()
+
+        workers = [threading.Thread(target=apostador, args=(u,)) for u in usuarios]
+        for w in workers:
+            w.start()
+        time.sleep(atraso)
+
+        jogo.placar_time1, jogo.placar_time2, jogo.finalizado = 1, 0, True
+        jogo.save()
+
+        time.sleep(atraso / 2)
+        parar.set()
+        for w in workers:
+            w.join()
+
+        aceitas = Aposta.objects.filter(jogo=jogo).count()
+        orfas = Aposta.objects.filter(jogo=jogo, status='PENDENTE').count()
+        return aceitas, orfas
+
+    def _descontar_resumos(self, modalidade):
+        """Tira dos resumos de análise as apostas liquidadas pelo teste.
+
+        As linhas por jogo e por modalidade somem no cascade, mas as por dia
+        não têm FK e guardariam as apostas falsas para sempre.
+        """
+        for jogo in Jogo.objects.filter(modalidade=modalidade):
+            liquidadas = Aposta.objects.filter(jogo=jogo, status__in=['GANHOU', 'PERDEU'])
+            registrar_liquidacao(jogo, liquidadas, sinal=-1)
+            dia = timezone.localdate(jogo.data).isoformat()
+            ResumoApostas.objects.filter(escopo='DIA', chave=dia, apostas=0).delete()
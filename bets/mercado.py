@@ -0,0 +1,34 @@
+from django.db import connection
+from django.utils import timezone
+from .models import Jogo
+
+
+class MercadoFechado(Exception):
+    """O jogo já foi finalizado ou já começou e não aceita mais apostas"""
+
+
+def travar_jogos_abertos(jogo_ids):
+    """Trava os jogos informados e retorna os ids dos que ainda aceitam apostas.
+
+    Deve ser chamada dentro de transaction.atomic(), antes de inserir as
+    apostas. No Postgres usa FOR SHARE: apostas simultâneas no mesmo jogo não
+    se bloqueiam, mas a liquidação (UPDATE do jogo) espera as inserções em
+    andamento terminarem, e quem chegar depois dela relê o jogo já fechado.
+    Assim nenhuma aposta fica PENDENTE depois da liquidação. No SQLite as
+    escritas já são serializadas (transações IMMEDIATE, ver settings).
+    """
+    jogo_ids = list(jogo_ids)
+    agora = timezone.now()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM {Jogo._meta.db_table} '
+                'WHERE id = ANY(%s) AND NOT finalizado AND data >= %s FOR SHARE',
+                [jogo_ids, agora],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    jogos = Jogo.objects.filter(pk__in=jogo_ids, finalizado=False, data__gte=agora)
+    if connection.features.has_select_for_update:
+        jogos = jogos.select_for_update()
+    return set(jogos.values_list('pk', flat=True))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 19:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bets', '0003_remove_perfil_saldo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoApostas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('escopo', models.CharField(choices=[('DIA', 'Dia'), ('JOGO', 'Jogo'), ('MODALIDADE', 'Modalidade')], max_length=10)),
+                ('chave', models.CharField(help_text='Data (AAAA-MM-DD), id do jogo ou id da modalidade', max_length=50)),
+                ('tipo', models.CharField(choices=[('1X2', 'Resultado 1X2'), ('PLACAR', 'Placar Exato'), ('VENCEDOR', 'Vencedor')], max_length=20)),
+                ('faixa_odd', models.CharField(max_length=10)),
+                ('data', models.DateField(blank=True, null=True)),
+                ('apostas', models.IntegerField(default=0)),
+                ('ganhas', models.IntegerField(default=0)),
+                ('perdidas', models.IntegerField(default=0)),
+                ('total_apostado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_pago', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('jogo', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bets.jogo')),
+                ('modalidade', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='bets.modalidade')),
+            ],
+            options={
+                'unique_together': {('escopo', 'chave', 'tipo', 'faixa_odd')},
+            },
+        ),
+    ]
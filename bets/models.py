@@ -1,22 +1,62 @@
+from bisect import bisect_right
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, When, Value
 from django.contrib.auth.models import User
 from decimal import Decimal
 
+# Limites de XP para cada nível (nível 1 começa em 0 XP); ver settings.NIVEL_THRESHOLDS
+NIVEL_THRESHOLDS = tuple(sorted(getattr(settings, 'NIVEL_THRESHOLDS', [0, 200, 600, 1500, 3000])))
+
+
+def calcular_nivel(xp):
+    """Retorna o nível correspondente a uma quantidade de XP (busca binária)"""
+    return max(1, bisect_right(NIVEL_THRESHOLDS, xp))
+
+
+def expressao_nivel(campo='xp'):
+    """Expressão CASE que calcula o nível no banco a partir do XP"""
+    return Case(
+        *[When(**{f'{campo}__gte': t}, then=Value(i))
+          for i, t in reversed(list(enumerate(NIVEL_THRESHOLDS, start=1)))],
+        default=Value(1),
+        output_field=models.IntegerField(),
+    )
+
+
+class PerfilQuerySet(models.QuerySet):
+    def recalcular_niveis(self, invalidar=True):
+        """Atualiza o nível de todos os perfis do queryset num único UPDATE ... CASE.
+
+        Só grava as linhas cujo nível mudou e retorna quantas foram alteradas.
+        Invalida o cache de todos os usuários de uma vez, o que só compensa na
+        tabela inteira; em subconjuntos passe invalidar=False e invalide só os
+        afetados (ver signals.atualizar_xp_usuarios).
+        """
+        from .cache import invalidar_todos_usuarios, nova_versao
+
+        expressao = expressao_nivel()
+        total = self.exclude(nivel=expressao).update(nivel=expressao)
+        if total and invalidar:
+            invalidar_todos_usuarios()
+            nova_versao('perfis')
+        return total
+
+
 class Perfil(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='perfil')
     xp = models.IntegerField(default=0)
     nivel = models.IntegerField(default=1)
+
+    objects = PerfilQuerySet.as_manager()
     
-    def atualizar_nivel(self):
-        # Exemplo de progressão simples; adapte como quiser
-        thresholds = [0, 200, 600, 1500, 3000]  # limites de XP para níveis
-        novo_nivel = self.nivel
-        for i, t in enumerate(thresholds, start=1):
-            if self.xp >= t:
-                novo_nivel = i
+    def atualizar_nivel(self, salvar=True):
+        """Recalcula o nível a partir do XP; com salvar=False só altera o objeto"""
+        novo_nivel = calcular_nivel(self.xp)
         if novo_nivel != self.nivel:
             self.nivel = novo_nivel
-            self.save()
+            if salvar:
+                self.save()
 
     def __str__(self):
         return f"{self.user.username} (XP: {self.xp})"
@@ -49,14 +89,11 @@ class Jogo(models.Model):
     
     def calcular_resultado_1x2(self):
         """Retorna o resultado do jogo no formato 1X2"""
+        from .apuracao import resultado_1x2
+
         if self.placar_time1 is None or self.placar_time2 is None:
             return None
-        if self.placar_time1 > self.placar_time2:
-            return '1'  # Vitória do time 1
-        elif self.placar_time1 < self.placar_time2:
-            return '2'  # Vitória do time 2
-        else:
-            return 'X'  # Empate
+        return resultado_1x2(self.placar_time1, self.placar_time2)
 
 class TipoAposta(models.TextChoices):
     RESULTADO_1X2 = '1X2', 'Resultado 1X2'
@@ -102,24 +139,18 @@ class Aposta(models.Model):
         return self.ganho_potencial
     
     def verificar_resultado(self):
-        """Verifica se a aposta ganhou ou perdeu"""
+        """Verifica se a aposta ganhou ou perdeu (para várias apostas, use apuracao.apurar_apostas)"""
+        from .apuracao import apurar_apostas
+
         if self.jogo.finalizado and self.jogo.placar_time1 is not None and self.jogo.placar_time2 is not None:
-            if self.tipo == TipoAposta.RESULTADO_1X2:
-                resultado_jogo = self.jogo.calcular_resultado_1x2()
-                if resultado_jogo == self.aposta_1x2:
-                    self.status = 'GANHOU'
-                    self.ganho_realizado = self.ganho_potencial
-                else:
-                    self.status = 'PERDEU'
-                    self.ganho_realizado = 0
-            elif self.tipo == TipoAposta.PLACAR_EXATO:
-                if (self.palpite_time1 == self.jogo.placar_time1 and 
-                    self.palpite_time2 == self.jogo.placar_time2):
-                    self.status = 'GANHOU'
-                    self.ganho_realizado = self.ganho_potencial
-                else:
-                    self.status = 'PERDEU'
-                    self.ganho_realizado = 0
+            status, ganhos = apurar_apostas(
+                self.jogo.placar_time1, self.jogo.placar_time2,
+                [self.tipo], [self.aposta_1x2], [self.palpite_time1], [self.palpite_time2],
+                [self.ganho_potencial],
+            )
+            if status[0] is not None:
+                self.status = status[0]
+                self.ganho_realizado = ganhos[0]
             self.save()
             return self.status
     
@@ -144,3 +175,48 @@ class Palpite(models.Model):
 
     def __str__(self):
         return f"{self.usuario.username} → {self.jogo}: {self.palpite_time1}-{self.palpite_time2}"
+
+
+class ResumoApostas(models.Model):
+    """Agregados de apostas liquidadas, mantidos incrementalmente na liquidação.
+
+    Consultas de análise leem só esta tabela, sem varrer Aposta. Cada linha é
+    um recorte (dia, jogo ou modalidade) x tipo de aposta x faixa de odd.
+    """
+    ESCOPO_CHOICES = [
+        ('DIA', 'Dia'),
+        ('JOGO', 'Jogo'),
+        ('MODALIDADE', 'Modalidade'),
+    ]
+    escopo = models.CharField(max_length=10, choices=ESCOPO_CHOICES)
+    chave = models.CharField(max_length=50, help_text="Data (AAAA-MM-DD), id do jogo ou id da modalidade")
+    tipo = models.CharField(max_length=20, choices=TipoAposta.choices)
+    faixa_odd = models.CharField(max_length=10)
+
+    # Referências para exibição (preenchidas conforme o escopo)
+    data = models.DateField(null=True, blank=True)
+    jogo = models.ForeignKey(Jogo, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    modalidade = models.ForeignKey(Modalidade, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    apostas = models.IntegerField(default=0)
+    ganhas = models.IntegerField(default=0)
+    perdidas = models.IntegerField(default=0)
+    total_apostado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_pago = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('escopo', 'chave', 'tipo', 'faixa_odd')
+
+    @property
+    def taxa_acerto(self):
+        """Percentual de apostas ganhas entre as liquidadas"""
+        liquidadas = self.ganhas + self.perdidas
+        return self.ganhas * 100 / liquidadas if liquidadas else 0
+
+    @property
+    def margem(self):
+        """Resultado da casa (apostado - pago)"""
+        return self.total_apostado - self.total_pago
+
+    def __str__(self):
+        return f"{self.get_escopo_display()} {self.chave} — {self.tipo} ({self.faixa_odd})"
@@ -0,0 +1,133 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+
+class MemoriaBackend:
+    """Token bucket em memória local (um balde por chave, por processo)"""
+
+    # Baldes guardados em LRU limitado: o menos usado é descartado em O(1).
+    # Uma chave descartada volta com o balde cheio, o que só acontece com
+    # quem ficou mais tempo sem requisições.
+    MAX_CHAVES = 10000
+
+    def __init__(self):
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consumir(self, chave, capacidade, taxa):
+        """Tenta consumir 1 token; retorna (permitido, segundos_ate_proximo_token)"""
+        agora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._baldes.pop(chave, (capacidade, agora))
+            tokens = min(capacidade, tokens + (agora - ultimo) * taxa)
+            permitido = tokens >= 1
+            if permitido:
+                tokens -= 1
+            self._baldes[chave] = (tokens, agora)
+            if len(self._baldes) > self.MAX_CHAVES:
+                self._baldes.popitem(last=False)
+        espera = 0 if permitido else (1 - tokens) / taxa
+        return permitido, espera
+
+
+class RedisBackend:
+    """Token bucket no Redis, compartilhado entre processos e servidores.
+
+    O cálculo é feito num script Lua (atômico) usando o relógio do próprio
+    Redis, para não depender do relógio de cada servidor.
+    """
+
+    SCRIPT = """
+    local capacidade = tonumber(ARGV[1])
+    local taxa = tonumber(ARGV[2])
+    local t = redis.call('TIME')
+    local agora = tonumber(t[1]) + tonumber(t[2]) / 1000000
+    local balde = redis.call('HMGET', KEYS[1], 'tokens', 'ultimo')
+    local tokens = tonumber(balde[1]) or capacidade
+    local ultimo = tonumber(balde[2]) or agora
+    tokens = math.min(capacidade, tokens + (agora - ultimo) * taxa)
+    local permitido = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        permitido = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ultimo', tostring(agora))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacidade / taxa * 1000))
+    return {permitido, tostring(tokens)}
+    """
+
+    def __init__(self):
+        import redis  # dependência opcional, só necessária com este backend
+        self._redis = redis.Redis.from_url(getattr(settings, 'RATELIMIT_REDIS_URL', 'redis://localhost:6379/0'))
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    def consumir(self, chave, capacidade, taxa):
+        """Tenta consumir 1 token; retorna (permitido, segundos_ate_proximo_token)"""
+        permitido, tokens = self._script(keys=[f'bets:ratelimit:{chave}'], args=[capacidade, taxa])
+        permitido = bool(int(permitido))
+        espera = 0 if permitido else (1 - float(tokens)) / taxa
+        return permitido, espera
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Instância única do backend configurado em RATELIMIT_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                caminho = getattr(settings, 'RATELIMIT_BACKEND', 'bets.ratelimit.MemoriaBackend')
+                _backend = import_string(caminho)()
+    return _backend
+
+
+def ip_cliente(request):
+    """IP do cliente (REMOTE_ADDR; configure o proxy reverso para preenchê-lo)"""
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def limitar_taxa(escopo):
+    """Limita requisições POST por usuário e por IP com token bucket.
+
+    Os limites vêm de settings.RATELIMIT[escopo], com uma entrada 'usuario' e
+    outra 'ip', cada uma com 'capacidade' (rajada máxima) e 'taxa' (tokens
+    repostos por segundo). Quando o limite estoura, responde 429 com o
+    cabeçalho Retry-After. O balde do usuário é consultado antes do balde do
+    IP, para que um usuário já bloqueado não esgote o IP compartilhado (NAT).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            limites = getattr(settings, 'RATELIMIT', {}).get(escopo)
+            if request.method != 'POST' or not getattr(settings, 'RATELIMIT_ENABLED', True) or not limites:
+                return view(request, *args, **kwargs)
+
+            chaves = []
+            if 'usuario' in limites and request.user.is_authenticated:
+                chaves.append((f'{escopo}:usuario:{request.user.pk}', limites['usuario']))
+            if 'ip' in limites:
+                chaves.append((f'{escopo}:ip:{ip_cliente(request)}', limites['ip']))
+
+            backend = get_backend()
+            for chave, limite in chaves:
+                permitido, espera = backend.consumir(chave, limite['capacidade'], limite['taxa'])
+                if not permitido:
+                    resposta = HttpResponse(
+                        'Muitas requisições. Aguarde alguns segundos e tente novamente.',
+                        status=429,
+                    )
+                    resposta['Retry-After'] = str(max(1, math.ceil(espera)))
+                    return resposta
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,8 +1,18 @@
-from django.db.models.signals import post_save
+from copy import copy
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Palpite, Jogo, Perfil, Aposta
-from django.db.models import Sum
+from .models import Palpite, Jogo, Perfil, Aposta, Modalidade
+from .cache import invalidar_usuario, invalidar_usuarios, nova_versao
+from .analytics import registrar_liquidacao
+from .apuracao import apurar_apostas, pontuar_palpites
+from django.utils import timezone
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+# Quantos usuários atualizar_xp_usuarios processa por UPDATE
+LOTE_XP = 500
 
 def calcular_pontos(palpite):
     jogo = palpite.jogo
@@ -11,20 +21,7 @@ def calcular_pontos(palpite):
     if jogo.placar_time1 is None or jogo.placar_time2 is None:
         return 0
 
-    # Placar exato: 50 pontos
-    if palpite.palpite_time1 == jogo.placar_time1 and palpite.palpite_time2 == jogo.placar_time2:
-        return 50
-
-    # Acertou o vencedor ou empate: 10 pontos
-    palpite_res = palpite.palpite_time1 - palpite.palpite_time2
-    jogo_res = jogo.placar_time1 - jogo.placar_time2
-
-    if (palpite_res > 0 and jogo_res > 0) or \
-       (palpite_res < 0 and jogo_res < 0) or \
-       (palpite_res == 0 and jogo_res == 0):
-        return 10
-
-    return 0
+    return pontuar_palpites(jogo.placar_time1, jogo.placar_time2, [palpite.palpite_time1], [palpite.palpite_time2])[0]
 
 
 def atualizar_xp_usuario(usuario):
@@ -36,8 +33,35 @@ def atualizar_xp_usuario(usuario):
     perfil, created = Perfil.objects.get_or_create(user=usuario)
     if perfil.xp != total_pontos:
         perfil.xp = total_pontos
-        perfil.atualizar_nivel()
-        perfil.save()
+        perfil.atualizar_nivel(salvar=False)
+        perfil.save(update_fields=['xp', 'nivel'])
+
+
+def atualizar_xp_usuarios(user_ids):
+    """Versão em lote de atualizar_xp_usuario.
+
+    Recalcula o XP dos usuários num UPDATE com subconsulta e depois o nível
+    num único UPDATE ... CASE, em vez de duas gravações por usuário. Os ids
+    vão em lotes de LOTE_XP para não estourar o limite de parâmetros do banco.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    total_pontos = Palpite.objects.filter(
+        usuario=OuterRef('user_id')
+    ).values('usuario').annotate(total=Sum('pontos')).values('total')
+    for inicio in range(0, len(user_ids), LOTE_XP):
+        lote = user_ids[inicio:inicio + LOTE_XP]
+        Perfil.objects.bulk_create(
+            [Perfil(user_id=user_id) for user_id in lote],
+            ignore_conflicts=True,
+        )
+        perfis = Perfil.objects.filter(user_id__in=lote)
+        perfis.update(xp=Coalesce(Subquery(total_pontos), 0))
+        perfis.recalcular_niveis(invalidar=False)
+        # O XP mudou mesmo onde o nível não mudou; só os afetados saem do cache
+        invalidar_usuarios(lote)
+    nova_versao('perfis')
 
 
 @receiver(post_save, sender=User)
@@ -47,36 +71,103 @@ def criar_perfil_usuario(sender, instance, created, **kwargs):
         Perfil.objects.get_or_create(user=instance)
 
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_usuario(sender, instance, update_fields=None, **kwargs):
+    """Descarta o usuário em cache quando seus dados (ex.: senha) mudam"""
+    invalidar_usuario(instance.pk)
+    # O ranking mostra o username; o login só grava last_login e não o afeta
+    if update_fields is None or set(update_fields) != {'last_login'}:
+        nova_versao('perfis')
+
+
+@receiver(post_save, sender=Perfil)
+@receiver(post_delete, sender=Perfil)
+def invalidar_cache_perfil(sender, instance, **kwargs):
+    """Descarta o pacote usuário + perfil e o ranking em cache quando XP ou nível mudam"""
+    invalidar_usuario(instance.user_id)
+    nova_versao('perfis')
+
+
+@receiver(post_save, sender=Jogo)
+@receiver(post_delete, sender=Jogo)
+@receiver(post_save, sender=Modalidade)
+@receiver(post_delete, sender=Modalidade)
+def invalidar_fragmentos_jogos(sender, instance, **kwargs):
+    """Descarta os fragmentos em cache da tabela de jogos"""
+    nova_versao('jogos')
+
+
 @receiver(post_save, sender=Jogo)
 def atualizar_pontuacoes(sender, instance, **kwargs):
     """Cada vez que um jogo é atualizado, recalcula pontos de todos os palpites e processa apostas."""
     if instance.placar_time1 is None or instance.placar_time2 is None:
         return  # Jogo ainda não terminou
 
-    # Processar palpites antigos (sistema antigo)
-    palpites = Palpite.objects.filter(jogo=instance)
+    apurar_jogo(instance)
+
+
+def apurar_jogo(jogo, reapurar=False):
+    """Apura palpites e apostas do jogo em lote com o motor de apuracao.py.
+
+    Por padrão só liquida apostas PENDENTES; com reapurar=True também refaz
+    as já liquidadas (ex.: placar corrigido), ajustando resumos e XP.
+    """
     usuarios_afetados = set()
 
-    for palpite in palpites:
-        novo_valor = calcular_pontos(palpite)
+    # Processar palpites antigos (sistema antigo)
+    palpites = list(Palpite.objects.filter(jogo=jogo).only('id', 'usuario_id', 'palpite_time1', 'palpite_time2', 'pontos'))
+    pontos = pontuar_palpites(
+        jogo.placar_time1, jogo.placar_time2,
+        [p.palpite_time1 for p in palpites], [p.palpite_time2 for p in palpites],
+    )
+    alterados = []
+    for palpite, novo_valor in zip(palpites, pontos):
         if palpite.pontos != novo_valor:
             palpite.pontos = novo_valor
             palpite.calculado = True
-            palpite.save(update_fields=['pontos', 'calculado'])
-            usuarios_afetados.add(palpite.usuario)
-
-    # Processar apostas (sistema tipo Bet365)
-    apostas = Aposta.objects.filter(jogo=instance, status='PENDENTE')
-    for aposta in apostas:
-        aposta.verificar_resultado()
-        
-        # Se ganhou, adiciona XP
-        if aposta.status == 'GANHOU':
-            atualizar_xp_usuario(aposta.usuario)
-
-    # Atualiza XP de todos os usuários que tiveram palpites neste jogo
-    for usuario in usuarios_afetados:
-        atualizar_xp_usuario(usuario)
+            alterados.append(palpite)
+            usuarios_afetados.add(palpite.usuario_id)
+    Palpite.objects.bulk_update(alterados, ['pontos', 'calculado'], batch_size=1000)
+
+    # Processar apostas (sistema tipo Bet365), só com o jogo finalizado. O
+    # UPDATE do jogo já fechou o mercado (ver mercado.travar_jogos_abertos);
+    # o lock das apostas faz uma segunda liquidação simultânea esperar a
+    # primeira, em vez de pular apostas que ficariam PENDENTES para sempre.
+    if jogo.finalizado:
+        status_apurados = ['PENDENTE', 'GANHOU', 'PERDEU'] if reapurar else ['PENDENTE']
+        with transaction.atomic():
+            apostas = list(Aposta.objects.select_for_update().filter(jogo=jogo, status__in=status_apurados))
+            novos_status, ganhos = apurar_apostas(
+                jogo.placar_time1, jogo.placar_time2,
+                [a.tipo for a in apostas], [a.aposta_1x2 for a in apostas],
+                [a.palpite_time1 for a in apostas], [a.palpite_time2 for a in apostas],
+                [a.ganho_potencial for a in apostas],
+            )
+            agora = timezone.now()
+            anteriores = []
+            alteradas = []
+            for aposta, status, ganho in zip(apostas, novos_status, ganhos):
+                if status is None:
+                    continue
+                if (aposta.status, aposta.ganho_realizado) == (status, ganho):
+                    continue
+                if aposta.status == 'GANHOU' or status == 'GANHOU':
+                    usuarios_afetados.add(aposta.usuario_id)
+                anteriores.append(copy(aposta))
+                aposta.status = status
+                aposta.ganho_realizado = ganho
+                aposta.atualizado_em = agora
+                alteradas.append(aposta)
+            Aposta.objects.bulk_update(alteradas, ['status', 'ganho_realizado', 'atualizado_em'], batch_size=1000)
+
+            # Atualiza os resumos de análise: tira a apuração anterior (se
+            # houver) e soma a nova
+            registrar_liquidacao(jogo, anteriores, sinal=-1)
+            registrar_liquidacao(jogo, alteradas)
+
+    # Atualiza XP e nível de todos os usuários afetados de uma vez
+    atualizar_xp_usuarios(usuarios_afetados)
 
 
 @receiver(post_save, sender=Palpite)
@@ -1,3 +1,418 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import Future
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .analytics import painel, registrar_liquidacao
+from .apuracao import apurar_apostas, pontuar_palpites
+from .coalescer import ApostaNaoGravada, FilaApostas, salvar_aposta
+from .mercado import MercadoFechado, travar_jogos_abertos
+from .models import Aposta, Jogo, Modalidade, Palpite, Perfil, ResumoApostas, calcular_nivel
+from .ratelimit import MemoriaBackend
+from .signals import apurar_jogo
+
+
+class CacheIdentidadeTests(TestCase):
+    """Usuário, perfil e sessão vêm do cache depois da primeira requisição"""
+
+    TABELAS_IDENTIDADE = ('"auth_user"', '"django_session"', '"bets_perfil"')
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user(username='apostador', password='senha')
+        self.client.force_login(self.usuario)
+
+    def _consultas_de_identidade(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return [q['sql'] for q in consultas if any(t in q['sql'] for t in self.TABELAS_IDENTIDADE)]
+
+    def test_pagina_autenticada_com_cache_quente_nao_consulta_identidade(self):
+        jogo = Jogo.objects.create(
+            modalidade=Modalidade.objects.create(nome='Futebol'), time1='A', time2='B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        for url in (reverse('minhas_apostas'), reverse('apostar', args=[jogo.pk])):
+            self.client.get(url)  # aquece o cache
+            self.assertEqual(self._consultas_de_identidade(url), [])
+
+    def test_xp_alterado_aparece_na_proxima_requisicao(self):
+        url = reverse('minhas_apostas')
+        self.client.get(url)
+
+        perfil = Perfil.objects.get(user=self.usuario)
+        perfil.xp = 777
+        perfil.save()
+
+        self.assertContains(self.client.get(url), '777')
+
+
+class MemoriaBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.backend = MemoriaBackend()
+        relogio = mock.patch('bets.ratelimit.time.monotonic', return_value=1000.0)
+        self.monotonic = relogio.start()
+        self.addCleanup(relogio.stop)
+
+    def test_rajada_igual_a_capacidade(self):
+        for _ in range(3):
+            self.assertEqual(self.backend.consumir('k', 3, 1), (True, 0))
+        permitido, espera = self.backend.consumir('k', 3, 1)
+        self.assertFalse(permitido)
+        self.assertAlmostEqual(espera, 1)
+
+    def test_tokens_sao_repostos_com_o_tempo(self):
+        for _ in range(3):
+            self.backend.consumir('k', 3, 2)
+        self.assertFalse(self.backend.consumir('k', 3, 2)[0])
+        self.monotonic.return_value += 0.5  # 0,5 s x 2 tokens/s = 1 token
+        self.assertTrue(self.backend.consumir('k', 3, 2)[0])
+        self.assertFalse(self.backend.consumir('k', 3, 2)[0])
+        self.monotonic.return_value += 60  # nunca passa da capacidade
+        for _ in range(3):
+            self.assertTrue(self.backend.consumir('k', 3, 2)[0])
+        self.assertFalse(self.backend.consumir('k', 3, 2)[0])
+
+    def test_descarta_a_chave_usada_menos_recentemente(self):
+        self.backend.MAX_CHAVES = 2
+        self.backend.consumir('a', 1, 1)
+        self.backend.consumir('b', 1, 1)
+        self.backend.consumir('a', 1, 1)  # 'a' passa a ser a mais recente
+        self.backend.consumir('c', 1, 1)
+        self.assertEqual(list(self.backend._baldes), ['a', 'c'])
+
+
+@override_settings(RATELIMIT_ENABLED=True, RATELIMIT={
+    'apostas': {
+        'usuario': {'capacidade': 5, 'taxa': 0.01},
+        'ip': {'capacidade': 8, 'taxa': 0.01},
+    },
+})
+class LimiteApostasTests(TestCase):
+    dados = {'tipo_aposta': '1X2', 'aposta_1x2': '1', 'valor_apostado': '10.00'}
+
+    def setUp(self):
+        backend = mock.patch('bets.ratelimit._backend', MemoriaBackend())
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.jogo = Jogo.objects.create(
+            modalidade=Modalidade.objects.create(nome='Futebol'), time1='A', time2='B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        self.url = reverse('apostar', args=[self.jogo.pk])
+
+    def _cliente(self, username):
+        self.client.force_login(User.objects.create(username=username))
+        return self.client
+
+    def test_sexta_aposta_seguida_recebe_429(self):
+        cliente = self._cliente('apostador')
+        for _ in range(5):
+            self.assertEqual(cliente.post(self.url, self.dados).status_code, 302)
+        resposta = cliente.post(self.url, self.dados)
+        self.assertEqual(resposta.status_code, 429)
+        self.assertGreaterEqual(int(resposta['Retry-After']), 1)
+        self.assertEqual(Aposta.objects.count(), 5)
+
+    def test_usuario_bloqueado_nao_esgota_o_ip(self):
+        cliente = self._cliente('abusivo')
+        for _ in range(20):
+            cliente.post(self.url, self.dados)
+        # Só as 5 permitidas ao usuário gastaram o IP (capacidade 8)
+        cliente = self._cliente('vizinho')
+        for _ in range(3):
+            self.assertEqual(cliente.post(self.url, self.dados).status_code, 302)
+        self.assertEqual(cliente.post(self.url, self.dados).status_code, 429)
+
+
+class FilaApostasTests(TransactionTestCase):
+    def setUp(self):
+        self.jogo = Jogo.objects.create(
+            modalidade=Modalidade.objects.create(nome='Futebol'), time1='A', time2='B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        self.usuario = User.objects.create(username='apostador')
+
+    def _aposta(self):
+        aposta = Aposta(
+            usuario=self.usuario, jogo=self.jogo, tipo='1X2', aposta_1x2='1',
+            valor_apostado=Decimal('10.00'), odd_aposta=Decimal('2.00'),
+        )
+        aposta.calcular_ganho_potencial()
+        return aposta
+
+    def test_aposta_com_timeout_nao_e_gravada_pelo_lote(self):
+        fila = FilaApostas(janela=0, lote=10)
+        with mock.patch.object(fila, '_iniciar'):  # nenhuma thread consome a fila
+            with self.assertRaises(ApostaNaoGravada):
+                fila.salvar(self._aposta(), timeout=0.01)
+        cancelada = fila._fila.get_nowait()
+        self.assertTrue(cancelada[1].cancelled())
+
+        aceita = (self._aposta(), Future())
+        fila._gravar([cancelada, aceita])
+        self.assertEqual(aceita[1].result(timeout=1).pk, Aposta.objects.get().pk)
+
+
+class NivelTests(TestCase):
+    """calcular_nivel (bisect em Python) e expressao_nivel (CASE no banco) concordam"""
+
+    def _conferir(self, limites):
+        valores = sorted({xp for limite in limites for xp in (limite - 1, limite, limite + 1)})
+        with mock.patch('bets.models.NIVEL_THRESHOLDS', limites):
+            for xp in valores:
+                User.objects.create(username=f'nivel_{xp}')
+                Perfil.objects.filter(user__username=f'nivel_{xp}').update(xp=xp, nivel=0)
+            Perfil.objects.all().recalcular_niveis()
+            for perfil in Perfil.objects.all():
+                with self.subTest(limites=limites, xp=perfil.xp):
+                    self.assertEqual(perfil.nivel, calcular_nivel(perfil.xp))
+
+    def test_limites_padrao(self):
+        self._conferir((0, 200, 600, 1500, 3000))
+
+    def test_primeiro_limite_diferente_de_zero(self):
+        self._conferir((100, 250, 1000))
+        self.assertEqual(Perfil.objects.get(xp=99).nivel, 1)
+        self.assertEqual(Perfil.objects.get(xp=1000).nivel, 3)
+
+
+class MotorApuracaoTests(SimpleTestCase):
+    def test_pontuar_palpites(self):
+        # Placar exato, vencedor certo, empate certo com placar errado, erro
+        pontos = pontuar_palpites(2, 1, [2, 3, 1, 0], [1, 0, 1, 1])
+        self.assertEqual(pontos, [50, 10, 0, 0])
+        self.assertEqual(pontuar_palpites(1, 1, [0, 1], [0, 1]), [10, 50])
+
+    def test_apurar_apostas(self):
+        status, ganhos = apurar_apostas(
+            2, 1,
+            ['1X2', '1X2', 'PLACAR', 'PLACAR', 'VENCEDOR'],
+            ['1', 'X', None, None, None],
+            [None, None, 2, 1, None],
+            [None, None, 1, 1, None],
+            [Decimal('20.00'), Decimal('30.00'), Decimal('100.00'), Decimal('100.00'), Decimal('15.00')],
+        )
+        self.assertEqual(status, ['GANHOU', 'PERDEU', 'GANHOU', 'PERDEU', None])
+        self.assertEqual(ganhos, [Decimal('20.00'), Decimal('0'), Decimal('100.00'), Decimal('0'), None])
+
+
+class ReapuracaoTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create(username='apostador')
+        self.jogo = Jogo.objects.create(
+            modalidade=Modalidade.objects.create(nome='Futebol'), time1='A', time2='B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        Palpite.objects.create(usuario=self.usuario, jogo=self.jogo, palpite_time1=1, palpite_time2=0)
+        self.aposta = Aposta(
+            usuario=self.usuario, jogo=self.jogo, tipo='1X2', aposta_1x2='1',
+            valor_apostado=Decimal('10.00'), odd_aposta=Decimal('2.00'),
+        )
+        self.aposta.calcular_ganho_potencial()
+        self.aposta.save()
+
+    def _resumo_do_jogo(self):
+        return ResumoApostas.objects.get(escopo='JOGO', chave=str(self.jogo.pk))
+
+    def test_reapurar_corrige_status_resumos_e_xp(self):
+        self.jogo.placar_time1, self.jogo.placar_time2, self.jogo.finalizado = 1, 0, True
+        self.jogo.save()
+
+        self.aposta.refresh_from_db()
+        self.assertEqual((self.aposta.status, self.aposta.ganho_realizado), ('GANHOU', Decimal('20.00')))
+        resumo = self._resumo_do_jogo()
+        self.assertEqual((resumo.apostas, resumo.ganhas, resumo.perdidas), (1, 1, 0))
+        self.assertEqual(resumo.total_pago, Decimal('20.00'))
+        self.assertEqual(Perfil.objects.get(user=self.usuario).xp, 50)
+
+        # Placar corrigido sem disparar o sinal; a reapuração refaz tudo
+        Jogo.objects.filter(pk=self.jogo.pk).update(placar_time1=0, placar_time2=1)
+        self.jogo.refresh_from_db()
+        apurar_jogo(self.jogo, reapurar=True)
+
+        self.aposta.refresh_from_db()
+        self.assertEqual((self.aposta.status, self.aposta.ganho_realizado), ('PERDEU', Decimal('0')))
+        resumo = self._resumo_do_jogo()
+        self.assertEqual((resumo.apostas, resumo.ganhas, resumo.perdidas), (1, 0, 1))
+        self.assertEqual(resumo.total_apostado, Decimal('10.00'))
+        self.assertEqual(resumo.total_pago, Decimal('0'))
+        self.assertEqual(Perfil.objects.get(user=self.usuario).xp, 0)
+
+    def test_reapurar_sem_mudanca_nao_altera_resumos(self):
+        self.jogo.placar_time1, self.jogo.placar_time2, self.jogo.finalizado = 1, 0, True
+        self.jogo.save()
+        apurar_jogo(self.jogo, reapurar=True)
+
+        resumo = self._resumo_do_jogo()
+        self.assertEqual((resumo.apostas, resumo.ganhas), (1, 1))
+        self.assertEqual(resumo.total_pago, Decimal('20.00'))
+
+
+class PainelAnaliseTests(TestCase):
+    def setUp(self):
+        # Duas modalidades com o mesmo nome não podem se misturar no painel
+        for valor in (Decimal('10.10'), Decimal('0.20')):
+            jogo = Jogo.objects.create(
+                modalidade=Modalidade.objects.create(nome='Futebol'), time1='A', time2='B',
+                data=timezone.now(),
+            )
+            registrar_liquidacao(jogo, [
+                Aposta(jogo=jogo, tipo='1X2', status='PERDEU', valor_apostado=valor,
+                       odd_aposta=Decimal('2.00'), ganho_realizado=Decimal('0')),
+                Aposta(jogo=jogo, tipo='1X2', status='GANHOU', valor_apostado=valor,
+                       odd_aposta=Decimal('2.00'), ganho_realizado=valor * 2),
+            ])
+
+    def test_agrupa_modalidades_pelo_id(self):
+        por_modalidade = painel()['por_modalidade']
+        self.assertEqual([linha['rotulo'] for linha in por_modalidade], ['Futebol', 'Futebol'])
+        self.assertEqual(
+            sorted(linha['total_apostado'] for linha in por_modalidade),
+            [Decimal('0.40'), Decimal('20.20')],
+        )
+
+    def test_api_devolve_valores_com_duas_casas(self):
+        staff = User.objects.create_user(username='staff', password='senha', is_staff=True)
+        self.client.force_login(staff)
+        por_tipo = self.client.get(reverse('api_analytics')).json()['por_tipo']
+        self.assertEqual(len(por_tipo), 1)
+        self.assertEqual(
+            (por_tipo[0]['total_apostado'], por_tipo[0]['total_pago'], por_tipo[0]['margem']),
+            ('20.60', '20.60', '0.00'),
+        )
+
+
+class LiquidacaoConcorrenteTests(TransactionTestCase):
+    """Apostas gravadas durante a liquidação nunca podem ficar PENDENTES"""
+
+    def setUp(self):
+        self.modalidade = Modalidade.objects.create(nome='Futebol')
+        self.jogo = Jogo.objects.create(
+            modalidade=self.modalidade, time1='A', time2='B',
+            data=timezone.now() + timedelta(days=1),
+        )
+        self.usuarios = [User.objects.create(username=f'apostador_{i}') for i in range(4)]
+
+    def _aposta(self, usuario):
+        aposta = Aposta(
+            usuario=usuario, jogo=self.jogo, tipo='1X2', aposta_1x2='1',
+            valor_apostado=Decimal('10.00'), odd_aposta=Decimal('2.00'),
+        )
+        aposta.calcular_ganho_potencial()
+        return aposta
+
+    def _liquidar(self):
+        self.jogo.placar_time1, self.jogo.placar_time2, self.jogo.finalizado = 1, 0, True
+        self.jogo.save()
+
+    def test_aposta_depois_da_liquidacao_e_recusada(self):
+        self._liquidar()
+        with self.assertRaises(MercadoFechado):
+            salvar_aposta(self._aposta(self.usuarios[0]))
+        self.assertFalse(Aposta.objects.exists())
+
+    def _corrida(self):
+        """Apostadores gravam sem parar enquanto o jogo é liquidado"""
+        gravou = threading.Event()
+
+        def apostador(usuario):
+            try:
+                while True:
+                    salvar_aposta(self._aposta(usuario))
+                    gravou.set()
+                    # Sem folga, os apostadores podem segurar o lock do SQLite
+                    # por mais que o timeout de quem liquida
+                    time.sleep(0.001)
+            except MercadoFechado:
+                pass
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=apostador, args=(u,)) for u in self.usuarios]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(gravou.wait(timeout=10))
+        self._liquidar()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertTrue(Aposta.objects.filter(jogo=self.jogo).exists())
+        self.assertFalse(Aposta.objects.filter(jogo=self.jogo, status='PENDENTE').exists())
+
+    def test_apostas_simultaneas_a_liquidacao(self):
+        self._corrida()
+
+    @override_settings(APOSTAS_COALESCER=True)
+    def test_apostas_simultaneas_a_liquidacao_com_coalescer(self):
+        self._corrida()
+
+    @skipUnless(connection.vendor == 'postgresql', 'FOR SHARE só existe no Postgres')
+    def test_liquidacao_espera_insercoes_em_andamento(self):
+        travado = threading.Event()
+        liberar = threading.Event()
+        liquidado = threading.Event()
+
+        def insercao():
+            try:
+                with transaction.atomic():
+                    self.assertEqual(travar_jogos_abertos([self.jogo.pk]), {self.jogo.pk})
+                    travado.set()
+                    liberar.wait(timeout=10)
+            finally:
+                connection.close()
+
+        def liquidacao():
+            try:
+                Jogo.objects.filter(pk=self.jogo.pk).update(finalizado=True)
+                liquidado.set()
+            finally:
+                connection.close()
+
+        threading.Thread(target=insercao).start()
+        self.assertTrue(travado.wait(timeout=10))
+        # Uma segunda inserção no mesmo jogo não espera a primeira...
+        with transaction.atomic():
+            self.assertEqual(travar_jogos_abertos([self.jogo.pk]), {self.jogo.pk})
+        # ...mas a liquidação espera todas terminarem
+        threading.Thread(target=liquidacao).start()
+        self.assertFalse(liquidado.wait(timeout=0.5))
+        liberar.set()
+        self.assertTrue(liquidado.wait(timeout=10))
+        with transaction.atomic():
+            self.assertEqual(travar_jogos_abertos([self.jogo.pk]), set())
+
+
+class SeedBetsTests(TransactionTestCase):
+    def _seed(self, **opcoes):
+        call_command(
+            'seed_bets', usuarios=20, modalidades=2, jogos=10,
+            palpites_por_usuario=2, apostas_por_usuario=3, stdout=StringIO(), **opcoes,
+        )
+
+    def test_gerar_de_novo_com_limpar(self):
+        self._seed()
+        self.assertTrue(ResumoApostas.objects.exists())
+        self._seed(limpar=True)
+
+        self.assertEqual(User.objects.filter(username__startswith='seed_').count(), 20)
+        self.assertEqual(Jogo.objects.count(), 10)
+        self.assertEqual(Aposta.objects.count(), 60)
+        self.assertEqual(
+            ResumoApostas.objects.filter(escopo='MODALIDADE').aggregate(total=Sum('apostas'))['total'],
+            Aposta.objects.filter(status__in=['GANHOU', 'PERDEU']).count(),
+        )
@@ -1,13 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# Sob ASGI as páginas de leitura usam as versões assíncronas
+leitura = views
+if settings.BETS_VIEWS_ASYNC:
+    from . import views_async as leitura
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('ranking/', views.ranking_view, name='ranking'),
-    path('jogos/', views.listar_jogos, name='listar_jogos'),
-    path('jogos/modalidade/<int:modalidade_id>/', views.listar_jogos, name='jogos_por_modalidade'),
+    path('', leitura.home, name='home'),
+    path('ranking/', leitura.ranking_view, name='ranking'),
+    path('jogos/', leitura.listar_jogos, name='listar_jogos'),
+    path('jogos/modalidade/<int:modalidade_id>/', leitura.listar_jogos, name='jogos_por_modalidade'),
     path('jogos/<int:jogo_id>/palpitar/', views.criar_palpite, name='criar_palpite'),
     path('jogos/<int:jogo_id>/apostar/', views.apostar, name='apostar'),
     path('meus-palpites/', views.meus_palpites, name='meus_palpites'),
     path('minhas-apostas/', views.minhas_apostas, name='minhas_apostas'),
+    path('analytics/', views.painel_analytics, name='painel_analytics'),
+    path('analytics/api/', views.api_analytics, name='api_analytics'),
 ]
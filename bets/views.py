@@ -1,57 +1,52 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.contrib import messages
 from django.utils import timezone
-from .models import Perfil, Jogo, Modalidade, Palpite, Aposta, TipoAposta
-from django.db.models import Q
+from .models import Jogo, Modalidade, Palpite, Aposta, TipoAposta
+from .cache import obter_perfil, versao
+from .coalescer import ApostaNaoGravada, salvar_aposta
+from .mercado import MercadoFechado
+from .ratelimit import limitar_taxa
+from .analytics import painel
+from . import consultas
 from decimal import Decimal
 
 def home(request):
     """Página inicial com informações sobre o sistema"""
-    modalidades = Modalidade.objects.all()
-    jogos_proximos = Jogo.objects.filter(
-        data__gte=timezone.now(),
-        finalizado=False
-    ).order_by('data')[:5]
-    
     context = {
-        'modalidades': modalidades,
-        'jogos_proximos': jogos_proximos,
+        'modalidades': Modalidade.objects.all(),
+        'jogos_proximos': consultas.proximos_jogos(),
     }
     return render(request, 'home.html', context)
 
 def ranking_view(request):
     """Exibe o ranking de jogadores por XP"""
-    top = Perfil.objects.select_related('user').order_by('-xp')[:50]
-    return render(request, 'ranking.html', {'top': top})
+    # Consulta preguiçosa: só roda se o fragmento da tabela não estiver em cache
+    return render(request, 'ranking.html', {'top': consultas.ranking(), 'versao_perfis': versao('perfis')})
 
 def listar_jogos(request, modalidade_id=None):
     """Lista todos os jogos, opcionalmente filtrados por modalidade"""
-    jogos = Jogo.objects.select_related('modalidade').all()
-    
     if modalidade_id:
         modalidade = get_object_or_404(Modalidade, id=modalidade_id)
-        jogos = jogos.filter(modalidade=modalidade)
     else:
         modalidade = None
     
     # Separar jogos por status
-    jogos_futuros = jogos.filter(data__gte=timezone.now(), finalizado=False).order_by('data')
-    jogos_passados = jogos.filter(
-        Q(data__lt=timezone.now()) | Q(finalizado=True)
-    ).order_by('-data')
-    
-    modalidades = Modalidade.objects.all()
+    jogos_futuros, jogos_passados = consultas.jogos_por_status(modalidade)
     
     context = {
         'jogos_futuros': jogos_futuros,
         'jogos_passados': jogos_passados,
-        'modalidades': modalidades,
+        'modalidades': Modalidade.objects.all(),
         'modalidade_selecionada': modalidade,
+        'versao_jogos': versao('jogos'),
     }
     return render(request, 'jogos/listar.html', context)
 
 @login_required
+@limitar_taxa('apostas')
 def criar_palpite(request, jogo_id):
     """Permite ao usuário criar um palpite para um jogo"""
     jogo = get_object_or_404(Jogo, id=jogo_id)
@@ -114,7 +109,7 @@ def meus_palpites(request):
     palpites_certos = palpites.filter(pontos__gt=0).count()
     
     # Obter ou criar perfil
-    perfil, created = Perfil.objects.get_or_create(user=request.user)
+    perfil = obter_perfil(request.user)
     
     context = {
         'palpites': palpites,
@@ -126,10 +121,11 @@ def meus_palpites(request):
     return render(request, 'palpites/meus_palpites.html', context)
 
 @login_required
+@limitar_taxa('apostas')
 def apostar(request, jogo_id):
     """Sistema tipo Bet365 - Criar aposta com odds e valores"""
     jogo = get_object_or_404(Jogo, id=jogo_id)
-    perfil, created = Perfil.objects.get_or_create(user=request.user)
+    perfil = obter_perfil(request.user)
     
     # Verificar se o jogo já passou ou está finalizado
     if jogo.finalizado or jogo.data < timezone.now():
@@ -174,8 +170,8 @@ def apostar(request, jogo_id):
                     messages.error(request, 'Os placares não podem ser negativos!')
                     return redirect('apostar', jogo_id=jogo.id)
             
-            # Criar aposta
-            aposta = Aposta.objects.create(
+            # Criar aposta (ganho potencial calculado antes, para gravar uma vez só)
+            aposta = Aposta(
                 usuario=request.user,
                 jogo=jogo,
                 tipo=tipo_aposta,
@@ -186,10 +182,15 @@ def apostar(request, jogo_id):
                 odd_aposta=odd_aposta,
                 status='PENDENTE'
             )
-            
-            # Calcular ganho potencial
             aposta.calcular_ganho_potencial()
-            aposta.save()
+            try:
+                salvar_aposta(aposta)
+            except MercadoFechado:
+                messages.error(request, 'Não é possível apostar em jogos que já foram finalizados!')
+                return redirect('listar_jogos')
+            except ApostaNaoGravada:
+                messages.error(request, 'Não foi possível registrar a aposta agora. Tente novamente.')
+                return redirect('apostar', jogo_id=jogo.id)
             
             messages.success(request, f'Aposta criada com sucesso! Ganho potencial: R$ {aposta.ganho_potencial:.2f}')
             return redirect('minhas_apostas')
@@ -210,7 +211,7 @@ def minhas_apostas(request):
         usuario=request.user
     ).select_related('jogo', 'jogo__modalidade').order_by('-criado_em')
     
-    perfil, created = Perfil.objects.get_or_create(user=request.user)
+    perfil = obter_perfil(request.user)
     
     # Estatísticas
     total_apostas = apostas.count()
@@ -231,3 +232,13 @@ def minhas_apostas(request):
         'total_apostado': total_apostado,
     }
     return render(request, 'apostas/minhas_apostas.html', context)
+
+@staff_member_required
+def painel_analytics(request):
+    """Painel de análise (acertos, volume e margem) lido só dos resumos"""
+    return render(request, 'analytics/painel.html', painel())
+
+@staff_member_required
+def api_analytics(request):
+    """Mesmos dados do painel em JSON"""
+    return JsonResponse(painel())
@@ -0,0 +1,70 @@
+"""Versões assíncronas das páginas de leitura (home, ranking e jogos).
+
+Usadas quando o projeto roda sob ASGI (daphne): as consultas usam o ORM
+assíncrono e as independentes rodam juntas com asyncio.gather, então a
+requisição não prende uma thread enquanto espera o banco. A renderização
+continua síncrona (template, sessão e usuário) e roda via sync_to_async.
+
+O que fica dentro de um {% cache %} do template é passado como queryset
+preguiçoso: só é consultado (já dentro do render) quando o fragmento não
+está em cache.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, aget_object_or_404
+from .cache import aversao
+from .models import Modalidade
+from . import consultas
+
+arender = sync_to_async(render)
+
+
+async def _listar(queryset):
+    return [obj async for obj in queryset]
+
+
+async def home(request):
+    """Página inicial com informações sobre o sistema"""
+    modalidades, jogos_proximos = await asyncio.gather(
+        _listar(Modalidade.objects.all()),
+        _listar(consultas.proximos_jogos()),
+    )
+
+    context = {
+        'modalidades': modalidades,
+        'jogos_proximos': jogos_proximos,
+    }
+    return await arender(request, 'home.html', context)
+
+
+async def ranking_view(request):
+    """Exibe o ranking de jogadores por XP"""
+    # Consulta preguiçosa: só roda se o fragmento da tabela não estiver em cache
+    top = consultas.ranking()
+    return await arender(request, 'ranking.html', {'top': top, 'versao_perfis': await aversao('perfis')})
+
+
+async def listar_jogos(request, modalidade_id=None):
+    """Lista todos os jogos, opcionalmente filtrados por modalidade"""
+    if modalidade_id:
+        modalidade = await aget_object_or_404(Modalidade, id=modalidade_id)
+    else:
+        modalidade = None
+
+    # Separar jogos por status; as tabelas ficam no cache de fragmentos, então
+    # só as modalidades (fora do fragmento) são buscadas aqui
+    jogos_futuros, jogos_passados = consultas.jogos_por_status(modalidade)
+    modalidades, versao_jogos = await asyncio.gather(
+        _listar(Modalidade.objects.all()),
+        aversao('jogos'),
+    )
+
+    context = {
+        'jogos_futuros': jogos_futuros,
+        'jogos_passados': jogos_passados,
+        'modalidades': modalidades,
+        'modalidade_selecionada': modalidade,
+        'versao_jogos': versao_jogos,
+    }
+    return await arender(request, 'jogos/listar.html', context)
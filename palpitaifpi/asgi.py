@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'palpitaifpi.settings')
+os.environ.setdefault('BETS_VIEWS_ASYNC', '1')
 
 application = get_asgi_application()
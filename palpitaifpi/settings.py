@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -69,6 +70,11 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'palpitaifpi.wsgi.application'
+ASGI_APPLICATION = 'palpitaifpi.asgi.application'
+
+# Usa as views assíncronas (bets/views_async.py) nas páginas de leitura.
+# O asgi.py liga isso por padrão; sob WSGI ficam as views síncronas.
+BETS_VIEWS_ASYNC = os.environ.get('BETS_VIEWS_ASYNC', '0') == '1'
 
 
 # Database
@@ -78,10 +84,82 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Transações pegam o lock de escrita logo no início, serializando
+        # apostas e liquidação sem erros de "database is locked"
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Banco de teste em arquivo: o padrão em memória (cache compartilhado)
+        # não espera locks, e os testes de concorrência usam várias conexões
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# LocMemCache é por processo e só serve para desenvolvimento. Com mais de um
+# worker (gunicorn, daphne), 'default' e 'fragmentos' precisam ser um cache
+# compartilhado (Redis ou Memcached): as versões 'jogos', 'perfis' e
+# 'usuarios' (bets/cache.py) ficam em 'default', e uma versão nova gravada
+# num worker precisa ser vista pelos outros, senão eles continuam servindo
+# fragmentos e usuários antigos até o TTL expirar.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'palpitaifpi',
+    },
+    # Fragmentos de template ({% cache ... using="fragmentos" %}), separados
+    # para não disputar espaço com sessões e usuários
+    'fragmentos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'palpitaifpi-fragmentos',
+    },
+}
+
+# Sessões lidas do cache (com fallback no banco) para não consultar
+# a tabela de sessões a cada requisição autenticada
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# O primeiro backend guarda usuário + perfil no cache; o ModelBackend
+# continua na lista para que sessões antigas sigam válidas
+AUTHENTICATION_BACKENDS = [
+    'bets.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Validade (segundos) do usuário + perfil em cache
+PERFIL_CACHE_TTL = 60
+
+
+# Rate limiting (token bucket) das views de aposta/palpite.
+# 'capacidade' é a rajada máxima e 'taxa' os tokens repostos por segundo.
+# Para compartilhar os baldes entre processos use 'bets.ratelimit.RedisBackend'.
+RATELIMIT_ENABLED = True
+RATELIMIT_BACKEND = 'bets.ratelimit.MemoriaBackend'
+RATELIMIT_REDIS_URL = 'redis://localhost:6379/0'
+RATELIMIT = {
+    'apostas': {
+        'usuario': {'capacidade': 5, 'taxa': 1},
+        'ip': {'capacidade': 100, 'taxa': 20},
+    },
+}
+
+# Agrupa apostas concorrentes num único bulk_create (janela em milissegundos)
+APOSTAS_COALESCER = False
+APOSTAS_COALESCER_JANELA_MS = 5
+APOSTAS_COALESCER_LOTE = 500
+
+
+# XP mínimo de cada nível (nível 1, 2, 3...). Depois de alterar, rode
+# `python manage.py recalcular_niveis` para atualizar os perfis existentes.
+NIVEL_THRESHOLDS = [0, 200, 600, 1500, 3000]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 